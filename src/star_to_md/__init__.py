@@ -1,10 +1,24 @@
 from star_to_md.core.registry import ProcessorRegistry
 from star_to_md.processors.hybrid.pdf import PdfProcessor
+from star_to_md.processors.pandoc.native import (
+    DocxProcessor,
+    EpubProcessor,
+    HtmlProcessor,
+    LatexProcessor,
+    OdtProcessor,
+    RstProcessor
+)
 
 def register_processors():
     """Register all available processors"""
     registry = ProcessorRegistry()
     registry.register("pdf", PdfProcessor)
+    registry.register("docx", DocxProcessor)
+    registry.register("html", HtmlProcessor)
+    registry.register("epub", EpubProcessor)
+    registry.register("odt", OdtProcessor)
+    registry.register("rst", RstProcessor)
+    registry.register("latex", LatexProcessor)
 
 # Register processors on import
 register_processors()
\ No newline at end of file
@@ -1,14 +1,18 @@
 import typer
 from rich.console import Console
+from rich.table import Table
 from pathlib import Path
-from typing import Optional
+from typing import Callable, List, Optional, TextIO
 import asyncio
 from functools import wraps
 from .config.settings import get_settings
 from .config.logging import setup_logging
 from .core.document import StarDocument
 from .core.registry import ProcessorRegistry
+from .services.extraction import calibrate as calibrate_extraction
+from .utils.detection import detect_format
 from .utils.errors import ErrorHandler
+from .utils.profiling import PipelineProfiler
 
 app = typer.Typer()
 console = Console()
@@ -21,6 +25,16 @@ def coro(f):
         return asyncio.run(f(*args, **kwargs))
     return wrapper
 
+def _token_writer(out_file: Optional[TextIO]) -> Callable[[str], None]:
+    """Build a token sink writing to a file or the console"""
+    def write(token: str) -> None:
+        if out_file:
+            out_file.write(token)
+            out_file.flush()
+        else:
+            console.print(token, end="", markup=False, highlight=False, soft_wrap=True)
+    return write
+
 @app.command()
 @coro
 async def convert(
@@ -28,36 +42,76 @@ async def convert(
     output: Optional[Path] = typer.Option(None, help="Output file"),
     format: Optional[str] = typer.Option(None, help="Force specific format"),
     debug: bool = typer.Option(False, "--debug", help="Enable debug mode"),
+    stream: bool = typer.Option(False, "--stream", help="Write output as it is generated (small documents)"),
+    json_logs: bool = typer.Option(False, "--json-logs", help="Write structured JSON logs from a background thread"),
+    memory_budget: Optional[int] = typer.Option(
+        None, "--memory-budget", help="Memory budget in MiB; spills finished chunks to disk"
+    ),
+    profile: Optional[Path] = typer.Option(
+        None, "--profile", help="Write CPU, stage timing, allocation and event-loop reports to this directory"
+    ),
 ):
     """Convert document to markdown"""
     try:
-        # Setup logging
-        setup_logging(debug)
-        
         # Load settings
         settings = get_settings()
         settings.debug = debug
+        if memory_budget is not None:
+            settings.memory_budget_mb = memory_budget
+        
+        # Setup logging
+        setup_logging(debug, structured=json_logs or settings.log_structured)
         
         # Initialize processor
-        processor = ProcessorRegistry().create_processor(format or "pdf")
+        format = format or detect_format(source) or "pdf"
+        processor = ProcessorRegistry().create_processor(format)
         
         # Create document
         doc = StarDocument(
             id=str(source),
             content="",  # Will be loaded by processor
-            format=format or "pdf",
+            format=format,
             path=source
         )
         
-        # Process document
-        result = await processor.process(doc)
+        # Process document, streaming output as it arrives if requested.
+        # Bounded-memory mode always streams so the result is never held whole.
+        stream = stream or settings.memory_budget_mb is not None
+        out_file = output.open("w") if output and stream else None
+        if profile:
+            processor.profiler = PipelineProfiler()
+            await processor.profiler.start()
+        try:
+            if stream:
+                processor.token_sink = _token_writer(out_file)
+            result = await processor.process(doc)
+        finally:
+            if out_file:
+                out_file.close()
+            if profile:
+                await processor.profiler.stop()
+                processor.profiler.write(profile)
+                console.print(f"✓ Profile written to: {profile}")
         
-        # Save or print result
+        # Save or print result, unless it was already streamed
+        streamed = result.metadata.get("streamed", False)
+        if not streamed:
+            processor.metrics.record_first_byte(doc.id)
         if output:
-            output.write_text(str(result))
+            if not streamed:
+                output.write_text(str(result))
             console.print(f"✓ Converted successfully to: {output}")
+        elif streamed:
+            console.print()
         else:
             console.print(str(result))
+        
+        reuse = result.metadata.get("reuse")
+        if reuse and reuse["lookups"]:
+            console.print(
+                f"✓ Reused {reuse['reused']} and revised {reuse['revised']} of {reuse['lookups']} chunks "
+                f"({reuse['rate']:.0%})"
+            )
             
     except Exception as e:
         if debug:
@@ -66,6 +120,30 @@ async def convert(
             console.print(f"[red]Error: {str(e)}")
         raise typer.Exit(1)
 
+@app.command()
+def calibrate(
+    samples: List[Path] = typer.Argument(..., help="Sample PDFs to benchmark"),
+    min_quality: Optional[float] = typer.Option(
+        None, help="Accept backends within this ratio of the best quality (default from settings)"
+    ),
+):
+    """Benchmark text extraction backends and pick one per document class"""
+    calibration = calibrate_extraction(samples, min_quality)
+    
+    table = Table("Class", "Backend", "Quality", "Seconds/page", "Samples", "Chosen")
+    for document_class, result in calibration["classes"].items():
+        for name, stats in result["backends"].items():
+            table.add_row(
+                document_class,
+                name,
+                f"{stats['quality']:.3f}",
+                f"{stats['seconds_per_page']:.4f}",
+                str(stats["samples"]),
+                "✓" if name == result["backend"] else ""
+            )
+    console.print(table)
+    console.print(f"✓ Calibration saved to: {get_settings().extraction_calibration_path}")
+
 def main():
     """Entry point for the CLI application"""
     app()
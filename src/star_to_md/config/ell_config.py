@@ -1,13 +1,249 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Set
+import logging
+import threading
+import httpx
+import openai
 import ell
 from .settings import get_settings
 
+try:
+    import h2  # noqa: F401
+except ImportError:  # Optional: pip install star_to_md[http2]
+    h2 = None
+
+logger = logging.getLogger(__name__)
+
+_pool_stats: Dict[str, "PoolStats"] = {}
+_initialized = False
+
+# Usage windows of conversions in progress, and the one the current task belongs to
+_open_windows: Set["PoolUsage"] = set()
+_windows_lock = threading.Lock()
+_current_window: ContextVar[Optional["PoolUsage"]] = ContextVar("pool_usage", default=None)
+
+def _pool_summary(max_connections: int, requests: int, peak_in_use: int) -> Dict[str, Any]:
+    return {
+        "max_connections": max_connections,
+        "requests": requests,
+        "peak_in_use": peak_in_use,
+        "peak_utilization": round(min(1.0, peak_in_use / max_connections), 3),
+        "peak_waiting": max(0, peak_in_use - max_connections),
+    }
+
+class PoolUsage:
+    """Pool usage during one conversion
+    
+    Requests are counted if made from the conversion's context (run_lmp copies
+    it into worker threads). The pools are shared, so the peaks are of total
+    usage while the conversion ran, including concurrent conversions.
+    """
+
+    def __init__(self):
+        self._requests: Dict[str, int] = {}
+        self._peaks: Dict[str, int] = {}
+        self._max_connections: Dict[str, int] = {}
+
+    def _observe(self, stats: "PoolStats", counted: bool) -> None:
+        # Called with stats._lock held
+        self._max_connections[stats.name] = stats.max_connections
+        self._peaks[stats.name] = max(self._peaks.get(stats.name, 0), stats.in_use)
+        if counted:
+            self._requests[stats.name] = self._requests.get(stats.name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: _pool_summary(max_connections, self._requests.get(name, 0), self._peaks[name])
+            for name, max_connections in self._max_connections.items()
+        }
+
+@contextmanager
+def track_pool_usage() -> Iterator[PoolUsage]:
+    """Attribute LLM pool usage in this context to a new PoolUsage window"""
+    usage = PoolUsage()
+    token = _current_window.set(usage)
+    with _windows_lock:
+        _open_windows.add(usage)
+    try:
+        yield usage
+    finally:
+        with _windows_lock:
+            _open_windows.discard(usage)
+        _current_window.reset(token)
+
+class PoolStats:
+    """Tracks requests holding, or waiting for, a connection from an HTTP pool
+
+    A request counts from when it is sent until its response body is closed,
+    so requests queued for a free connection push usage above max_connections.
+    """
+
+    def __init__(self, name: str, max_connections: int):
+        self.name = name
+        self.max_connections = max_connections
+        self.requests = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Callable[[], None]:
+        """Count a request, returning a callback to release it"""
+        with self._lock:
+            self.requests += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            current = _current_window.get()
+            with _windows_lock:
+                for window in _open_windows:
+                    window._observe(self, counted=window is current)
+
+        released = False
+        def release() -> None:
+            nonlocal released
+            with self._lock:
+                if not released:
+                    released = True
+                    self.in_use -= 1
+        return release
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Usage since the pool was created"""
+        with self._lock:
+            summary = _pool_summary(self.max_connections, self.requests, self.peak_in_use)
+            summary["in_use"] = self.in_use
+            return summary
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response body that releases its pool slot when closed"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """Async response body that releases its pool slot when closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for part in self._stream:
+            yield part
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+class _TrackedTransport(httpx.HTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        release = self.stats.acquire()
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+class _AsyncTrackedTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, stats: PoolStats, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        release = self.stats.acquire()
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+def _transport_options() -> Dict[str, Any]:
+    """Connection pool options shared by the sync and async clients"""
+    settings = get_settings()
+    http2 = settings.llm_http2
+    if http2 and h2 is None:
+        logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        http2 = False
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry
+        ),
+    }
+
+def _client_options() -> Dict[str, Any]:
+    """OpenAI client options shared by the sync and async clients"""
+    settings = get_settings()
+    return {
+        # A local OpenAI-compatible server usually ignores the key, but the client requires one
+        "api_key": settings.openai_api_key or ("local" if settings.llm_base_url else None),
+        "base_url": settings.llm_base_url,
+        "max_retries": 0,  # Retries are handled by retry_with_jitter
+    }
+
+def _timeout() -> httpx.Timeout:
+    settings = get_settings()
+    return httpx.Timeout(settings.llm_read_timeout, connect=settings.llm_connect_timeout)
+
+@lru_cache
+def get_llm_client() -> openai.OpenAI:
+    """OpenAI client with a pooled HTTP connection, shared by every LMP"""
+    stats = _pool_stats.setdefault("sync", PoolStats("sync", get_settings().llm_max_connections))
+    http_client = httpx.Client(transport=_TrackedTransport(stats, **_transport_options()), timeout=_timeout())
+    return openai.OpenAI(http_client=http_client, **_client_options())
+
+@lru_cache
+def get_async_llm_client() -> openai.AsyncOpenAI:
+    """Async counterpart of get_llm_client(), used for streaming completions"""
+    stats = _pool_stats.setdefault("async", PoolStats("async", get_settings().llm_max_connections))
+    http_client = httpx.AsyncClient(
+        transport=_AsyncTrackedTransport(stats, **_transport_options()),
+        timeout=_timeout()
+    )
+    return openai.AsyncOpenAI(http_client=http_client, **_client_options())
+
+def llm_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Process-wide usage of the shared HTTP connection pools created so far"""
+    return {name: stats.snapshot() for name, stats in _pool_stats.items()}
+
 def init_ell():
-    """Initialize ell configuration"""
+    """Initialize ell configuration
+    
+    The shared client is not created here, so processors can be built without
+    credentials; run_lmp() passes it to each LMP call instead.
+    """
+    global _initialized
+    if _initialized:
+        return
     settings = get_settings()
     
     # Configure ell
     ell.init(
-        store='./logs/ell',  # Store ell logs in the logs directory
+        store=settings.ell_store_path,  # Store ell logs in the logs directory
         verbose=settings.debug,  # Enable verbose mode in debug
-        autocommit=True  # Enable automatic versioning
+        autocommit=settings.ell_autocommit  # Enable automatic versioning
     )
+    _initialized = True
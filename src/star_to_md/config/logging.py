@@ -1,16 +1,122 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
 from rich.logging import RichHandler
 import sys
+from .settings import get_settings
 
-def setup_logging(debug: bool = False) -> None:
-    """Configure application logging"""
+document_id_var = contextvars.ContextVar("document_id", default=None)
+chunk_id_var = contextvars.ContextVar("chunk_id", default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+@contextmanager
+def log_context(document_id: Optional[str] = None, chunk_id: Optional[int] = None) -> Iterator[None]:
+    """Tag log records emitted inside the block with a document and/or chunk ID"""
+    tokens = []
+    if document_id is not None:
+        tokens.append((document_id_var, document_id_var.set(document_id)))
+    if chunk_id is not None:
+        tokens.append((chunk_id_var, chunk_id_var.set(chunk_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+class ContextFilter(logging.Filter):
+    """Copies the current document and chunk IDs onto each record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.document_id = document_id_var.get()
+        record.chunk_id = chunk_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Rate-limits noisy DEBUG/INFO call sites, then samples what's left
+
+    Each call site (logger and line) may log `burst` records per second; past
+    that only every `sample_rate`-th record gets through. Warnings and errors
+    are never dropped.
+    """
+
+    def __init__(self, burst: int, sample_rate: int):
+        super().__init__()
+        self.burst = burst
+        self.sample_rate = max(1, sample_rate)
+        self._windows: Dict[Tuple[str, int], Tuple[int, int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.lineno)
+        second = int(time.monotonic())
+        window, count = self._windows.get(key, (second, 0))
+        if window != second:
+            window, count = second, 0
+        count += 1
+        self._windows[key] = (window, count)
+
+        overflow = count - self.burst
+        return overflow <= 0 or overflow % self.sample_rate == 0
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "document_id": getattr(record, "document_id", None),
+            "chunk_id": getattr(record, "chunk_id", None),
+        }
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that keeps records structured for the listener's formatters"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks can't be pickled or safely read from another thread
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def setup_logging(debug: bool = False, structured: bool = False) -> None:
+    """Configure application logging
+    
+    In structured mode, records are queued and written as JSON lines by a
+    background listener thread, so handlers never block the event loop.
+    """
     log_dir = Path('./logs')
     log_dir.mkdir(exist_ok=True)
     
     # Set log level based on debug flag
     log_level = logging.DEBUG if debug else logging.INFO
     
+    if structured:
+        _setup_structured_logging(log_dir, log_level)
+        return
+    
     # Create handlers
     file_handler = logging.FileHandler(log_dir / 'star_to_md.log')
     file_handler.setLevel(log_level)
@@ -46,4 +152,47 @@ def setup_logging(debug: bool = False) -> None:
         # Log some debug info
         logger.debug("Debug mode enabled")
         logger.debug(f"Python version: {sys.version}")
-        logger.debug(f"Log directory: {log_dir.absolute()}") 
\ No newline at end of file
+        logger.debug(f"Log directory: {log_dir.absolute()}")
+
+def _setup_structured_logging(log_dir: Path, log_level: int) -> None:
+    """Route all records through a queue to a background JSON-lines listener"""
+    global _listener
+    settings = get_settings()
+    _stop_listener()
+
+    file_handler = logging.FileHandler(log_dir / 'star_to_md.jsonl')
+    file_handler.setLevel(log_level)
+    file_handler.setFormatter(JsonFormatter())
+
+    error_handler = logging.FileHandler(log_dir / 'errors.jsonl')
+    error_handler.setLevel(logging.ERROR)
+    error_handler.setFormatter(JsonFormatter())
+
+    console_handler = RichHandler(show_path=False)
+    console_handler.setLevel(logging.WARNING)
+
+    # Filters run on the emitting thread, before the record is queued
+    queue_handler = _QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(settings.log_burst, settings.log_sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(log_level)
+
+    _listener = logging.handlers.QueueListener(
+        queue_handler.queue, file_handler, error_handler, console_handler,
+        respect_handler_level=True
+    )
+    _listener.start()
+
+def _stop_listener() -> None:
+    """Flush queued records and stop the background listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(_stop_listener)
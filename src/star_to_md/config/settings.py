@@ -15,17 +15,82 @@ class Settings(BaseSettings):
     llm_model: str = "gpt-4o-mini"
     llm_temperature: float = 0.1
     
+    # Model Tiering
+    llm_strong_model: str = "gpt-4o"
+    llm_complexity_threshold: float = 0.6
+    llm_token_costs: Dict[str, float] = {  # USD per 1K tokens
+        "gpt-4o-mini": 0.0006,
+        "gpt-4o": 0.01,
+    }
+    
+    # Per-document Budget (None disables the limit)
+    document_token_budget: Optional[int] = None
+    document_cost_budget: Optional[float] = None
+    
+    # HTTP Client (one pooled client shared by every LLM call)
+    llm_base_url: Optional[str] = None  # e.g. a local OpenAI-compatible server
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 120.0
+    llm_http2: bool = False  # Requires the http2 extra
+    
     # Ell Settings
     ell_store_path: str = "./logs/ell"
     ell_autocommit: bool = True
     ell_verbose: bool = False
     
+    # Retries and Circuit Breaker
+    llm_retry_attempts: int = 3
+    llm_retry_base_delay: float = 0.5
+    llm_retry_max_delay: float = 8.0
+    circuit_failure_threshold: int = 5  # Consecutive transient failures before failing fast
+    circuit_reset_timeout: float = 30.0
+    
+    # Request Hedging
+    llm_hedging: bool = False
+    hedge_percentile: float = 0.95  # Hedge calls slower than this share of recent calls
+    hedge_min_samples: int = 10
+    hedge_window: int = 100
+    hedge_max_extra_fraction: float = 0.1  # At most this many hedges per primary call
+    
+    # Streaming
+    stream_max_chunks: int = 4  # Larger documents are not streamed
+    
+    # Logging
+    log_structured: bool = False  # Queue records to a background JSON-lines writer
+    log_burst: int = 20  # DEBUG/INFO records per call site per second before sampling
+    log_sample_rate: int = 10  # Past the burst, keep one record in this many
+    
     # Processing Settings
     max_chunk_size: int = 4
     confidence_threshold: float = 0.8
     
+    # Text Extraction
+    extraction_backend: str = "auto"  # auto, pypdf, pdftotext or pdfminer
+    extraction_calibration_path: str = "./logs/extraction_calibration.json"
+    extraction_min_quality: float = 0.9  # Calibration accepts backends within this ratio of the best quality
+    
+    # Bounded-memory Mode (enabled by setting a budget)
+    memory_budget_mb: Optional[int] = None
+    spool_window: int = 8  # Chunks held in memory before enhancing and spilling to disk
+    spool_dir: Optional[str] = None  # Defaults to the system temp directory
+    
+    # Request Packing
+    pack_small_chunk_tokens: int = 500  # Chunks above this are sent on their own
+    pack_max_tokens: int = 2000  # Upper bound for a packed request
+    
+    # Near-duplicate Chunk Reuse
+    similarity_reuse: bool = False
+    similarity_index_path: str = "./logs/similarity.db"
+    similarity_threshold: float = 0.85  # Jaccard similarity of normalized chunks to count as a near-duplicate
+    similarity_num_perm: int = 128  # MinHash signature length
+    similarity_bands: int = 32  # LSH bands; must divide similarity_num_perm
+    
     # Pandoc Settings
     pandoc_path: Optional[str] = None
+    pandoc_llm_fallback: bool = False  # Enhance pandoc-native output with the LLM when quality checks fail
     
     class Config:
         env_prefix = "STAR_TO_MD_"
@@ -1,9 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import Protocol
+from contextlib import nullcontext
+from typing import Awaitable, Callable, ContextManager, Optional, Protocol, TypeVar
 from .document import StarDocument, MarkdownResult
+from ..config.ell_config import PoolUsage, track_pool_usage
+from ..config.logging import log_context
 from ..config.settings import Settings, get_settings
-from ..utils.errors import ErrorHandler, ValidationError
+from ..utils.errors import CircuitOpenError, ErrorHandler, ValidationError
+from ..utils.resilience import caused_by, get_circuit_breaker, is_transient, retry_with_jitter
 from ..utils.monitoring import MetricsCollector
+from ..utils.profiling import PipelineProfiler
+
+T = TypeVar("T")
 
 class ProcessorProtocol(Protocol):
     """Protocol for processor implementations"""
@@ -27,30 +34,69 @@ class BaseProcessor(ProcessorProtocol):
         self.settings = settings or get_settings()
         self.metrics = MetricsCollector()
         self.error_handler = ErrorHandler()
+        # When set, output is written here as it is produced
+        self.token_sink: Optional[Callable[[str], None]] = None
+        # When set, pipeline stages are timed for the profiling report
+        self.profiler: Optional[PipelineProfiler] = None
     
     async def process(self, doc: StarDocument) -> MarkdownResult:
         """Main processing pipeline"""
+        with log_context(document_id=doc.id), track_pool_usage() as pool_usage:
+            return await self._process(doc, pool_usage)
+    
+    async def _process(self, doc: StarDocument, pool_usage: PoolUsage) -> MarkdownResult:
         self.metrics.start_conversion(doc.id)
         
         try:
             # Preprocessing
-            preprocessed = await self.preprocess(doc)
+            with self._stage("preprocess"):
+                preprocessed = await self.preprocess(doc)
             
             # Conversion
-            result = await self.convert(preprocessed)
+            with self._stage("convert"):
+                result = await self.convert(preprocessed)
             
             # Validation
-            if not await self.validate(result):
-                raise ValidationError("Validation failed", document_id=doc.id)
+            with self._stage("validate"):
+                valid = await self.validate(result)
+            if not valid:
+                raise ValidationError(
+                    "Validation failed",
+                    validation_errors={"result": "empty or below confidence threshold"},
+                    document_id=doc.id
+                )
                 
             return result
             
         except Exception as e:
             # Error handling
-            recovery_result = await self.error_handler.handle_error(e)
-            if recovery_result:
-                return MarkdownResult(content=recovery_result, confidence=0.5)
+            await self.error_handler.handle_error(e)
+            if caused_by(e, CircuitOpenError) or is_transient(e):
+                # The LLM provider is unavailable; degrade rather than fail
+                fallback = await self.fallback_convert(doc)
+                if fallback is not None:
+                    self.metrics.record_fallback(doc.id, "provider_unavailable")
+                    return fallback
             raise
             
         finally:
-            self.metrics.end_conversion(doc.id) 
\ No newline at end of file
+            self.metrics.record_circuit(doc.id, get_circuit_breaker().snapshot())
+            self.metrics.record_pool(doc.id, pool_usage.snapshot())
+            self.metrics.end_conversion(doc.id)
+    
+    def _stage(self, name: str) -> ContextManager[None]:
+        """Time a pipeline stage when profiling"""
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.stage(name)
+    
+    async def _guarded(self, document_id: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run an LLM call through the shared circuit breaker, retrying transient errors"""
+        return await retry_with_jitter(
+            lambda: get_circuit_breaker().call(factory),
+            on_retry=lambda e: self.metrics.record_retry(document_id)
+        )
+    
+    async def fallback_convert(self, doc: StarDocument) -> Optional[MarkdownResult]:
+        """Convert without any LLM calls, or return None if the processor can't"""
+        return None
@@ -1,7 +1,9 @@
 from typing import Optional, Dict, Any
+import json
 import ell
 from ..config.settings import get_settings
 from ..config.ell_config import init_ell
+from .runner import run_lmp
 
 class LLMClient:
     """Client for LLM interactions using ell"""
@@ -10,8 +12,25 @@ class LLMClient:
         self.settings = get_settings()
         init_ell()  # Initialize ell if not already initialized
     
-    @ell.simple(model="gpt-4o-mini")
     async def enhance_markdown(self, content: str) -> str:
+        """Enhance markdown through the shared client, without blocking the event loop"""
+        return await run_lmp(self._enhance_markdown, content, api_params={"model": self.settings.llm_model})
+    
+    async def validate_markdown(self, content: str) -> Dict[str, Any]:
+        """Validate markdown, returning {"valid": bool, "issues": [str]}"""
+        response = str(await run_lmp(self._validate_markdown, content, api_params={"model": self.settings.llm_model}))
+        # Models often wrap JSON in a ```json fence
+        text = response.strip().strip("`").strip()
+        if text.startswith("json"):
+            text = text[len("json"):]
+        try:
+            result = json.loads(text)
+        except ValueError:
+            return {"valid": False, "issues": [f"Unreadable validation response: {response}"]}
+        return result if isinstance(result, dict) else {"valid": False, "issues": [str(result)]}
+    
+    @ell.simple(model="gpt-4o-mini")
+    def _enhance_markdown(self, content: str) -> str:
         """You are an expert markdown enhancer focused on clarity and readability."""
         return [
             ell.system("Enhance the markdown while preserving structure and meaning."),
@@ -19,7 +38,7 @@ class LLMClient:
         ]
     
     @ell.simple(model="gpt-4o-mini", temperature=0.1)
-    async def validate_markdown(self, content: str) -> Dict[str, Any]:
+    def _validate_markdown(self, content: str) -> str:
         """You are a markdown validation specialist."""
         return [
             ell.system("""
@@ -29,4 +48,4 @@ class LLMClient:
             - issues: list of strings (empty if valid)
             """),
             ell.user(content)
-        ]
\ No newline at end of file
+        ]
@@ -0,0 +1,109 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+import asyncio
+import logging
+import time
+from ..config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class HedgeOutcome:
+    """Result of a possibly hedged call"""
+    value: Any
+    hedged: bool = False
+    hedge_won: bool = False
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+
+    def __init__(self, window: int):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def percentile(self, percentile: float) -> float:
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(percentile * len(ordered)))
+        return ordered[index]
+
+class HedgedCaller:
+    """Issues a duplicate LLM request when the first one runs past a learned latency percentile"""
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or get_settings()
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.calls = 0
+        self.hedges = 0
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there is too little history"""
+        tracker = self.trackers.get(key)
+        if tracker is None or len(tracker.samples) < self.settings.hedge_min_samples:
+            return None
+        return tracker.percentile(self.settings.hedge_percentile)
+
+    def _within_cap(self) -> bool:
+        return self.hedges < self.settings.hedge_max_extra_fraction * self.calls
+
+    def _observe(self, key: str, latency: float) -> None:
+        tracker = self.trackers.setdefault(key, LatencyTracker(self.settings.hedge_window))
+        tracker.observe(latency)
+
+    async def call(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        allow_hedge: Callable[[], bool] = lambda: True
+    ) -> HedgeOutcome:
+        """Run factory(), hedging with a second invocation if it is slow
+
+        factory() must return an awaitable that leaves the event loop free
+        while the request is in flight (see run_lmp), or the hedge timer can
+        never fire. The first successful response wins and the other is
+        cancelled; a request running in a worker thread is abandoned rather
+        than aborted, and finishes in the background.
+        """
+        self.calls += 1
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(factory())
+        delay = self.hedge_delay(key) if self.settings.llm_hedging else None
+
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and self._within_cap() and allow_hedge():
+                return await self._race(key, started, primary, factory)
+
+        try:
+            value = await primary
+        finally:
+            primary.cancel()
+        self._observe(key, time.perf_counter() - started)
+        return HedgeOutcome(value=value)
+
+    async def _race(
+        self,
+        key: str,
+        started: float,
+        primary: "asyncio.Future[Any]",
+        factory: Callable[[], Awaitable[Any]]
+    ) -> HedgeOutcome:
+        """Race the slow primary against a hedge request"""
+        self.hedges += 1
+        logger.debug(f"Hedging slow {key} call after {time.perf_counter() - started:.2f}s")
+        hedge = asyncio.ensure_future(factory())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if not task.cancelled() and task.exception() is None:
+                        self._observe(key, time.perf_counter() - started)
+                        return HedgeOutcome(value=task.result(), hedged=True, hedge_won=task is hedge)
+            # Both requests failed; surface the primary's error
+            return HedgeOutcome(value=primary.result(), hedged=True)
+        finally:
+            for task in (primary, hedge):
+                task.cancel()
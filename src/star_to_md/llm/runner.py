@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+import asyncio
+import contextvars
+from ..config.ell_config import get_llm_client
+from ..config.settings import get_settings
+from ..utils.profiling import profile_worker
+
+T = TypeVar("T")
+
+# Calls an LMP on some content, returning None if the call was skipped
+LMPCall = Callable[[Callable[..., str], str], Awaitable[Optional[str]]]
+
+@lru_cache
+def _executor() -> ThreadPoolExecutor:
+    # One worker per pooled connection, so threads never outnumber connections
+    return ThreadPoolExecutor(
+        max_workers=get_settings().llm_max_connections,
+        thread_name_prefix="lmp"
+    )
+
+async def run_lmp(lmp: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a synchronous ell LMP in a worker thread, keeping the event loop free
+
+    ell's LMPs block for the whole HTTP request, so calling one on the loop
+    would stall every other chunk. Context variables (log context) are copied
+    into the worker. Cancelling the returned coroutine stops waiting for the
+    result, but the request itself runs to completion in its thread.
+
+    The call uses the shared pooled client, created on first use so missing
+    credentials only fail once an LLM call is actually made.
+    """
+    kwargs.setdefault("client", get_llm_client())
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_executor(), partial(context.run, _run_profiled, lmp, *args, **kwargs))
+
+def _run_profiled(lmp: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    with profile_worker():
+        return lmp(*args, **kwargs)
+
+async def call_lmp(lmp: Callable[..., str], content: str) -> Optional[str]:
+    """Default LMPCall: run the LMP with its own model and no budget"""
+    return await run_lmp(lmp, content)
@@ -0,0 +1,34 @@
+from typing import Any, AsyncIterator
+from ..config.ell_config import get_async_llm_client
+from ..config.settings import get_settings
+
+async def stream_completion(
+    system: str,
+    user: str,
+    model: str = None,
+    temperature: float = None,
+    **api_params: Any
+) -> AsyncIterator[str]:
+    """Stream a chat completion token by token
+
+    ell's LMPs only hand back the finished string, so streaming calls go to
+    the OpenAI-compatible API directly using the same prompts and the
+    shared connection pool.
+    """
+    settings = get_settings()
+    stream = await get_async_llm_client().chat.completions.create(
+        model=model or settings.llm_model,
+        temperature=settings.llm_temperature if temperature is None else temperature,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": user}
+        ],
+        stream=True,
+        **api_params
+    )
+    try:
+        async for event in stream:
+            if event.choices and event.choices[0].delta.content:
+                yield event.choices[0].delta.content
+    finally:
+        await stream.close()
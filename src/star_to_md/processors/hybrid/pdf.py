@@ -1,15 +1,29 @@
 from star_to_md.core import BaseProcessor
 from star_to_md.core.document import StarDocument, MarkdownResult
+from star_to_md.config.logging import log_context
 from star_to_md.config.settings import Settings
 from star_to_md.services.analyzer import PDFAnalyzer
 from star_to_md.services.chunker import PDFChunker
 from star_to_md.services.enhancer import ContentEnhancer
-from star_to_md.utils.errors import ProcessorError
+from star_to_md.services.extraction import select_backend
+from star_to_md.services.packer import ChunkPacker
+from star_to_md.services.router import ModelRouter, ModelTier, TokenBudget, estimate_tokens
+from star_to_md.services.similarity import SimilarityIndex, revision_request, source_diff
+from star_to_md.services.spool import ChunkSpool
+from star_to_md.llm.hedging import HedgedCaller
+from star_to_md.llm.runner import LMPCall, run_lmp
+from star_to_md.utils.errors import CircuitOpenError, ProcessorError
 from star_to_md.utils.pandoc import is_pandoc_available, get_pandoc_path
+from star_to_md.utils.resilience import get_circuit_breaker, is_transient
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
+import logging
 import tempfile
 import subprocess
+import time
 import ell
 
+logger = logging.getLogger(__name__)
+
 class PdfProcessor(BaseProcessor):
     """PDF processor implementation"""
     
@@ -18,43 +32,78 @@ class PdfProcessor(BaseProcessor):
         self.analyzer = PDFAnalyzer()
         self.chunker = PDFChunker()
         self.enhancer = ContentEnhancer()
+        self.router = ModelRouter(self.settings)
+        self.packer = ChunkPacker(self.settings)
+        self.hedger = HedgedCaller(self.settings)
+        self.breaker = get_circuit_breaker()
+        self.similarity = SimilarityIndex(self.settings) if self.settings.similarity_reuse else None
     
     async def preprocess(self, doc: StarDocument) -> StarDocument:
         """Analyze and prepare PDF"""
-        analysis = await self.analyzer.analyze(doc)
+        # The document's budget also covers the analysis and chunking calls
+        budget = doc.metadata["budget"] = self.router.new_budget()
+        with self._stage("analyze"):
+            # Without an analysis, routing falls back to local heuristics
+            analysis = await self.analyzer.analyze(doc, self._optional_llm(doc.id, budget))
         doc.metadata["analysis"] = analysis
         return doc
     
     async def convert(self, doc: StarDocument) -> MarkdownResult:
         """Convert PDF to markdown"""
         try:
+            budget = doc.metadata.get("budget") or self.router.new_budget()
+            analysis = doc.metadata.get("analysis")
+            
+            if self.settings.memory_budget_mb is not None:
+                return await self._convert_bounded(doc, budget, analysis)
+            
             # Get chunks
-            chunks = await self.chunker.chunk(doc)
+            with self._stage("chunk"):
+                chunks = await self.chunker.chunk(doc, self._optional_llm(doc.id, budget))
             
-            # Process chunks
-            processed = []
-            for chunk in chunks:
+            # Convert chunks with pandoc and route each to a model tier
+            tiers = []
+            converted = []
+            for index, chunk in enumerate(chunks):
                 try:
-                    # Process with pandoc
-                    pandoc_result = await self._pandoc_convert(chunk)
-                    
-                    # Enhance with LLM
-                    enhanced = await self.enhancer.enhance(pandoc_result)
-                    
-                    processed.append(enhanced)
+                    with log_context(chunk_id=index):
+                        tier = self.router.route(chunk, analysis)
+                        converted.append(await self._pandoc_convert(chunk, doc.id, tier, budget))
+                    tiers.append(tier)
                     
                 except Exception as e:
-                    self.metrics.add_error(doc.id, str(e))
-                    if len(processed) == 0:
-                        raise ProcessorError(
-                            message=str(e),
-                            processor_name="PdfProcessor",
-                            document_id=doc.id,
-                            source=e
-                        )
+                    self._chunk_failed(doc.id, e, succeeded=len(converted))
+            
+            # Small documents stream their final LLM call to the token sink
+            streaming = self.token_sink is not None and len(converted) <= self.settings.stream_max_chunks
+            if streaming and len(converted) == 1:
+                # A single chunk needs no combine step, so stream its enhancement
+                content = await self._stream_llm(
+                    doc.id, tiers[0], budget, self.enhancer.stream_enhance, converted[0],
+                    fallback=converted[0]
+                )
+            else:
+                # Enhance with LLM
+                processed = await self._enhance_chunks(doc.id, budget, converted, tiers)
+                
+                # Combine results
+                combine = self._stream_llm if streaming else self._call_llm
+                content = await combine(
+                    doc.id, self.router.default_tier, budget,
+                    self.enhancer.stream_combine if streaming else self.enhancer.combine,
+                    processed, fallback="\n\n".join(processed)
+                )
             
-            # Combine results
-            return await self.enhancer.combine(processed)
+            return MarkdownResult(
+                content=str(content),
+                metadata={
+                    "budget": budget.summary(),
+                    "degraded": self.metrics.fallback_count(doc.id) > 0,
+                    "streamed": streaming,
+                    "extraction_backend": doc.metadata.get("extraction_backend"),
+                    "reuse": self._reuse_summary(doc.id)
+                }
+            )
         except Exception as e:
             if not isinstance(e, ProcessorError):
                 raise ProcessorError(
@@ -65,22 +114,390 @@ class PdfProcessor(BaseProcessor):
                 )
             raise
     
+    async def _convert_bounded(self, doc: StarDocument, budget: TokenBudget, analysis) -> MarkdownResult:
+        """Convert while holding only a window of chunks in memory
+        
+        Chunks are read lazily, enhanced a window at a time and spilled to disk.
+        The final document is streamed to the token sink rather than combined
+        by the LLM, since that would need the whole document in one prompt.
+        """
+        max_resident = self.settings.memory_budget_mb * 1024 * 1024 // 4
+        with ChunkSpool(directory=self.settings.spool_dir) as spool:
+            tiers = []
+            window = []
+            offset = 0
+            index = -1
+            async for chunk in self.chunker.iter_chunks(doc):
+                index += 1
+                try:
+                    with log_context(chunk_id=index):
+                        tier = self.router.route(chunk, analysis)
+                        window.append(await self._pandoc_convert(chunk, doc.id, tier, budget))
+                    tiers.append(tier)
+                    
+                except Exception as e:
+                    self._chunk_failed(doc.id, e, succeeded=spool.count + len(window))
+                self.metrics.sample_rss(doc.id)
+                
+                if len(window) >= self.settings.spool_window or sum(map(len, window)) >= max_resident:
+                    parts = await self._enhance_chunks(doc.id, budget, window, tiers, offset, spool.count)
+                    with self._stage("spool"):
+                        for part in parts:
+                            spool.append(part)
+                    offset += len(window)
+                    tiers, window = [], []
+                    self.metrics.sample_rss(doc.id)
+            
+            parts = await self._enhance_chunks(doc.id, budget, window, tiers, offset, spool.count)
+            with self._stage("spool"):
+                for part in parts:
+                    spool.append(part)
+            
+            peak = self.metrics.sample_rss(doc.id)
+            logger.info(f"Spooled {spool.count} chunks for {doc.id}, peak sampled RSS {peak or 0:.1f} MiB")
+            with self._stage("spool"):
+                if self.token_sink is not None:
+                    spool.replay(lambda block: self._emit(doc.id, block))
+                    content = ""
+                else:
+                    logger.warning(f"No output sink for {doc.id}; loading the bounded-memory result into memory")
+                    content = spool.read_all()
+            
+            return MarkdownResult(
+                content=content,
+                metadata={
+                    "budget": budget.summary(),
+                    "degraded": self.metrics.fallback_count(doc.id) > 0,
+                    "streamed": self.token_sink is not None,
+                    "spooled_chunks": spool.count,
+                    "peak_rss_mb": peak,
+                    "extraction_backend": doc.metadata.get("extraction_backend"),
+                    "reuse": self._reuse_summary(doc.id)
+                }
+            )
+    
+    async def _enhance_chunks(
+        self,
+        document_id: str,
+        budget: TokenBudget,
+        converted: List[str],
+        tiers: List[ModelTier],
+        offset: int = 0,
+        succeeded: int = 0
+    ) -> List[str]:
+        """Enhance converted chunks, packing small chunks of the same tier into one request
+        
+        Chunks close to one converted before are answered from the similarity
+        index first, so only the rest are sent for full enhancement. A group
+        whose request fails keeps its pandoc output, unless no chunk has been
+        enhanced at all.
+        """
+        processed: Dict[int, str] = {}
+        kept = 0
+        error = None
+        if self.similarity is not None:
+            for index, chunk in enumerate(converted):
+                with log_context(chunk_id=offset + index):
+                    reused = await self._reuse_similar(document_id, budget, chunk)
+                if reused is not None:
+                    processed[index] = reused
+        
+        pending = [index for index in range(len(converted)) if index not in processed]
+        for group in self.packer.pack([converted[i] for i in pending], keys=[tiers[i].name for i in pending]):
+            indices = [pending[i] for i in group]
+            try:
+                tier = tiers[indices[0]]
+                with log_context(chunk_id=offset + indices[0]):
+                    parts = await self._enhance_group(document_id, tier, budget, [converted[i] for i in indices])
+                # A None part means the LLM was skipped, so the pandoc output stays
+                processed.update(
+                    (index, converted[index] if part is None else part) for index, part in zip(indices, parts)
+                )
+                self._remember(indices, converted, parts)
+                
+            except Exception as e:
+                # Keep the whole group's pandoc output rather than dropping its chunks
+                logger.warning(f"Enhancing {len(indices)} chunks failed for {document_id}, keeping the pandoc output: {str(e)}")
+                self.metrics.add_error(document_id, str(e))
+                self.metrics.record_fallback(document_id, "llm_error")
+                processed.update((index, converted[index]) for index in indices)
+                kept += len(indices)
+                error = e
+        
+        if error is not None and succeeded + len(processed) - kept == 0:
+            raise self._conversion_error(document_id, error)
+        return [processed[index] for index in sorted(processed)]
+    
+    async def _reuse_similar(self, document_id: str, budget: TokenBudget, chunk: str) -> Optional[str]:
+        """Answer a chunk from a near-duplicate converted earlier, or return None
+        
+        Chunks differing only in whitespace reuse the stored markdown as is;
+        others send the stored markdown and a source diff to the fast tier.
+        """
+        match = self.similarity.lookup(chunk)
+        if match is None:
+            self.metrics.record_similarity(document_id, "miss")
+            return None
+        if match.exact:
+            self.metrics.record_similarity(document_id, "reused")
+            return match.markdown
+        
+        try:
+            revised = await self._call_llm(
+                document_id, self.router.default_tier, budget, self.enhancer.revise,
+                revision_request(match.markdown, source_diff(match.source, chunk)),
+                fallback=None
+            )
+        except Exception as e:
+            logger.warning(f"Revising a near-duplicate chunk failed for {document_id}: {str(e)}")
+            revised = None
+        if revised is None:
+            self.metrics.record_similarity(document_id, "miss")
+            return None
+        
+        self.metrics.record_similarity(document_id, "revised")
+        self.similarity.add(chunk, str(revised))
+        return str(revised)
+    
+    def _remember(self, indices: List[int], converted: List[str], parts: List[Optional[str]]) -> None:
+        """Add enhanced chunks to the similarity index, skipping those the LLM never saw"""
+        if self.similarity is None:
+            return
+        for index, part in zip(indices, parts):
+            if part is not None:
+                self.similarity.add(converted[index], str(part))
+    
+    def _reuse_summary(self, document_id: str) -> Optional[Dict[str, Union[int, float]]]:
+        """Similarity reuse counts and rate for the run, if reuse is enabled"""
+        metrics = self.metrics.metrics.get(document_id)
+        if self.similarity is None or metrics is None:
+            return None
+        summary = {
+            "lookups": metrics.similarity_lookups,
+            "reused": metrics.chunks_reused,
+            "revised": metrics.chunks_revised,
+            "rate": metrics.reuse_rate,
+        }
+        logger.info(
+            f"Answered {summary['reused'] + summary['revised']}/{summary['lookups']} chunks of {document_id} "
+            f"from the similarity index ({summary['reused']} reused, {summary['revised']} revised)"
+        )
+        return summary
+    
+    def _chunk_failed(self, document_id: str, error: Exception, succeeded: int) -> None:
+        """Record a chunk failure, aborting if nothing has succeeded yet"""
+        self.metrics.add_error(document_id, str(error))
+        if succeeded == 0:
+            raise self._conversion_error(document_id, error)
+    
+    @staticmethod
+    def _conversion_error(document_id: str, error: Exception) -> ProcessorError:
+        return ProcessorError(
+            message=str(error),
+            processor_name="PdfProcessor",
+            document_id=document_id,
+            source=error
+        )
+    
+    async def _enhance_group(
+        self,
+        document_id: str,
+        tier: ModelTier,
+        budget: TokenBudget,
+        group: List[str]
+    ) -> List[Optional[str]]:
+        """Enhance a group of chunks, packing them into a single request when possible
+        
+        A part is None if the LLM was skipped for it (budget spent or circuit open).
+        """
+        if len(group) == 1:
+            return [await self._call_llm(
+                document_id, tier, budget, self.enhancer.enhance, group[0], fallback=None
+            )]
+        
+        response = await self._call_llm(
+            document_id, tier, budget, self.enhancer.enhance_packed, self.packer.render(group),
+            fallback=None
+        )
+        if response is None:
+            return [None] * len(group)
+        
+        parts = self.packer.split(str(response), len(group))
+        self.metrics.record_pack(document_id, len(group), split_ok=parts is not None)
+        if parts is not None:
+            return parts
+        
+        logger.warning(f"Malformed packed response for {document_id}, enhancing {len(group)} chunks individually")
+        return [
+            await self._call_llm(document_id, tier, budget, self.enhancer.enhance, chunk, fallback=None)
+            for chunk in group
+        ]
+    
     async def validate(self, result: MarkdownResult) -> bool:
         """Validate the conversion result"""
-        if not result.content:
+        if not result.content and not result.metadata.get("streamed"):
             return False
         return result.confidence >= self.settings.confidence_threshold 
     
-    async def _pandoc_convert(self, chunk: str) -> str:
+    async def _call_llm(
+        self,
+        document_id: str,
+        tier: ModelTier,
+        budget: TokenBudget,
+        lmp: Callable[..., str],
+        content: Union[str, List[str]],
+        fallback: Optional[str]
+    ) -> Optional[str]:
+        """Call an LMP on the given tier, returning the fallback if the budget is spent or the circuit is open"""
+        prompt_tokens = self._prompt_tokens(content)
+        if not self._within_budget(document_id, tier, budget, prompt_tokens):
+            return fallback
+        
+        started = time.perf_counter()
+        try:
+            with self._stage(f"llm:{lmp.__name__}"):
+                outcome = await self.hedger.call(
+                    f"{tier.name}:{lmp.__name__}",
+                    lambda: self._guarded(document_id, lambda: run_lmp(lmp, content, api_params=tier.api_params)),
+                    allow_hedge=lambda: budget.fits(4 * prompt_tokens, tier.model)
+                )
+        except CircuitOpenError:
+            self.metrics.record_fallback(document_id, "circuit_open")
+            return fallback
+        latency = time.perf_counter() - started
+        
+        extra_tokens = 0
+        if outcome.hedged:
+            # The duplicate request is billed for its prompt even when cancelled
+            extra_tokens = prompt_tokens
+            self.metrics.record_hedge(document_id, outcome.hedge_won)
+        self._charge(document_id, tier, budget, prompt_tokens + extra_tokens, outcome.value, latency)
+        return outcome.value
+    
+    def _optional_llm(self, document_id: str, budget: TokenBudget) -> LMPCall:
+        """Call an LMP the pipeline can do without on the default tier
+        
+        The call is skipped if its prompt does not fit the budget; unlike a
+        chunk's call this does not mark the budget exhausted. It is also
+        skipped while the provider is unavailable, after counting towards the
+        circuit breaker.
+        """
+        async def call(lmp: Callable[..., str], content: str) -> Optional[str]:
+            tier = self.router.default_tier
+            if not budget.fits(2 * self._prompt_tokens(content), tier.model):
+                logger.info(f"Skipping {lmp.__name__} for {document_id}, its prompt does not fit the token budget")
+                return None
+            try:
+                return await self._call_llm(document_id, tier, budget, lmp, content, fallback=None)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                logger.warning(f"{lmp.__name__} failed for {document_id}, continuing without it: {str(e)}")
+                return None
+        return call
+    
+    async def _stream_llm(
+        self,
+        document_id: str,
+        tier: ModelTier,
+        budget: TokenBudget,
+        stream: Callable[..., AsyncIterator[str]],
+        content: Union[str, List[str]],
+        fallback: str
+    ) -> str:
+        """Stream an LLM call on the given tier to the token sink"""
+        prompt_tokens = self._prompt_tokens(content)
+        if not self._within_budget(document_id, tier, budget, prompt_tokens):
+            self._emit(document_id, fallback)
+            return fallback
+        
+        async def consume() -> str:
+            parts = []
+            async for token in stream(content, api_params=tier.api_params):
+                self._emit(document_id, token)
+                parts.append(token)
+            return "".join(parts)
+        
+        # Tokens may already have been written, so streamed calls are not retried
+        started = time.perf_counter()
+        try:
+            with self._stage(f"llm:{stream.__name__}"):
+                response = await self.breaker.call(consume)
+        except CircuitOpenError:
+            self.metrics.record_fallback(document_id, "circuit_open")
+            self._emit(document_id, fallback)
+            return fallback
+        
+        self._charge(document_id, tier, budget, prompt_tokens, response, time.perf_counter() - started)
+        return response
+    
+    def _emit(self, document_id: str, text: str) -> None:
+        """Write output to the token sink"""
+        self.metrics.record_first_byte(document_id)
+        self.token_sink(text)
+    
+    @staticmethod
+    def _prompt_tokens(content: Union[str, List[str]]) -> int:
+        return estimate_tokens(content if isinstance(content, str) else "\n".join(content))
+    
+    def _within_budget(self, document_id: str, tier: ModelTier, budget: TokenBudget, prompt_tokens: int) -> bool:
+        # Assume the response is about as long as the prompt
+        if budget.can_afford(2 * prompt_tokens, tier.model):
+            return True
+        logger.info(f"Token budget exhausted for {document_id}, using pandoc-only output")
+        self.metrics.record_fallback(document_id, "budget")
+        return False
+    
+    def _charge(
+        self,
+        document_id: str,
+        tier: ModelTier,
+        budget: TokenBudget,
+        prompt_tokens: int,
+        response: str,
+        latency: float
+    ) -> None:
+        """Charge a finished call to the budget and record it"""
+        tokens = prompt_tokens + estimate_tokens(str(response))
+        cost = budget.charge(tokens, tier.model)
+        self.metrics.record_llm_call(document_id, tier.name, tier.model, tokens, cost, latency)
+    
+    async def _pandoc_convert(
+        self,
+        chunk: str,
+        document_id: str,
+        tier: ModelTier,
+        budget: TokenBudget
+    ) -> str:
         """Convert chunk using pandoc if available"""
+        result = self._run_pandoc(chunk)
+        if result is None:
+            # Fall back to direct LLM conversion if pandoc isn't available or fails
+            return await self._call_llm(document_id, tier, budget, self._direct_convert, chunk, fallback=chunk)
+        return result
+    
+    async def fallback_convert(self, doc: StarDocument) -> Optional[MarkdownResult]:
+        """Pandoc-only conversion used while the LLM provider is unavailable"""
+        if not doc.path:
+            return None
+        backend = select_backend(doc.path)
+        
+        converted = [self._run_pandoc(text) or text for text in backend.extract_pages(doc.path) if text.strip()]
+        return MarkdownResult(
+            content="\n\n".join(converted),
+            confidence=0.5,
+            metadata={"degraded": True, "converter": "pandoc", "extraction_backend": backend.name}
+        )
+    
+    def _run_pandoc(self, chunk: str) -> Optional[str]:
+        """Convert plain text with pandoc, or return None if pandoc is missing or fails"""
         if not is_pandoc_available():
-            # Fall back to direct LLM conversion if pandoc isn't available
-            return await self._direct_convert(chunk)
+            return None
         
         pandoc_path = get_pandoc_path()
         try:
             # Write chunk to temporary file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt') as temp_in:
+            with self._stage("pandoc"), tempfile.NamedTemporaryFile(mode='w', suffix='.txt') as temp_in:
                 temp_in.write(chunk)
                 temp_in.flush()
                 
@@ -93,15 +510,15 @@ class PdfProcessor(BaseProcessor):
                 )
                 return result.stdout
         except subprocess.SubprocessError as e:
-            # Log error and fall back to direct conversion
+            # Log error and let the caller fall back
             self.metrics.add_error(
                 "pandoc_conversion",
                 f"Pandoc conversion failed: {str(e)}"
             )
-            return await self._direct_convert(chunk)
+            return None
     
     @ell.simple(model="gpt-4o-mini")
-    async def _direct_convert(self, chunk: str) -> str:
+    def _direct_convert(self, chunk: str) -> str:
         """Direct conversion using LLM when pandoc isn't available"""
         return [
             ell.system("Convert the following text to clean markdown format."),
@@ -0,0 +1,121 @@
+from star_to_md.core import BaseProcessor
+from star_to_md.core.document import StarDocument, MarkdownResult
+from star_to_md.config.settings import Settings
+from star_to_md.services.enhancer import ContentEnhancer
+from star_to_md.llm.runner import run_lmp
+from star_to_md.utils.errors import CircuitOpenError, ProcessorError
+from star_to_md.utils.pandoc import convert_file, is_pandoc_available
+from star_to_md.utils.resilience import caused_by, is_transient
+from star_to_md.utils.validation import check_markdown_quality
+from typing import Optional
+import asyncio
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+class PandocProcessor(BaseProcessor):
+    """Direct pandoc conversion for formats pandoc reads natively"""
+    
+    input_format: str = None
+    
+    def __init__(self, settings: Settings = None):
+        super().__init__(settings)
+        self._enhancer: Optional[ContentEnhancer] = None
+    
+    @property
+    def enhancer(self) -> ContentEnhancer:
+        # Only pay for ell setup when a conversion actually needs the LLM
+        if self._enhancer is None:
+            self._enhancer = ContentEnhancer()
+        return self._enhancer
+    
+    async def preprocess(self, doc: StarDocument) -> StarDocument:
+        """Check the document can be handed to pandoc"""
+        if not doc.path or not doc.path.exists():
+            raise ProcessorError(
+                message=f"Source file not found: {doc.path}",
+                processor_name=type(self).__name__,
+                document_id=doc.id
+            )
+        if not is_pandoc_available():
+            raise ProcessorError(
+                message="pandoc is required for this format",
+                processor_name=type(self).__name__,
+                document_id=doc.id
+            )
+        return doc
+    
+    async def convert(self, doc: StarDocument) -> MarkdownResult:
+        """Convert with pandoc, using the LLM only if opted in and local checks fail"""
+        loop = asyncio.get_running_loop()
+        try:
+            with self._stage("pandoc"):
+                content = await loop.run_in_executor(None, convert_file, doc.path, self.input_format)
+        except subprocess.CalledProcessError as e:
+            raise ProcessorError(
+                message=f"Pandoc conversion failed: {e.stderr or str(e)}",
+                processor_name=type(self).__name__,
+                document_id=doc.id,
+                source=e
+            )
+        
+        issues = check_markdown_quality(content)
+        metadata = {
+            "converter": "pandoc",
+            "input_format": self.input_format,
+            "quality_issues": issues,
+            "enhanced": False
+        }
+        
+        if issues and self.settings.pandoc_llm_fallback:
+            logger.info(f"Quality checks failed for {doc.id} ({', '.join(issues)}), enhancing with LLM")
+            pandoc_output = content
+            try:
+                with self._stage("llm:enhance"):
+                    content = await self._guarded(doc.id, lambda: run_lmp(
+                        self.enhancer.enhance,
+                        pandoc_output,
+                        api_params={"model": self.settings.llm_model, "temperature": self.settings.llm_temperature}
+                    ))
+                metadata["enhanced"] = True
+            except Exception as e:
+                if not (caused_by(e, CircuitOpenError) or is_transient(e)):
+                    raise
+                # Keep the pandoc output rather than failing the conversion
+                logger.warning(f"LLM unavailable for {doc.id}, keeping the pandoc output: {str(e)}")
+                self.metrics.record_fallback(
+                    doc.id, "circuit_open" if caused_by(e, CircuitOpenError) else "provider_unavailable"
+                )
+        
+        return MarkdownResult(content=str(content), metadata=metadata)
+    
+    async def validate(self, result: MarkdownResult) -> bool:
+        """Validate the conversion result"""
+        if not result.content:
+            return False
+        return result.confidence >= self.settings.confidence_threshold
+
+class DocxProcessor(PandocProcessor):
+    """Word (DOCX) processor"""
+    input_format = "docx"
+
+class HtmlProcessor(PandocProcessor):
+    """HTML processor"""
+    input_format = "html"
+
+class EpubProcessor(PandocProcessor):
+    """EPUB processor"""
+    input_format = "epub"
+
+class OdtProcessor(PandocProcessor):
+    """OpenDocument text processor"""
+    input_format = "odt"
+
+class RstProcessor(PandocProcessor):
+    """reStructuredText processor"""
+    input_format = "rst"
+
+class LatexProcessor(PandocProcessor):
+    """LaTeX processor"""
+    input_format = "latex"
@@ -1,8 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import ell
 from PyPDF2 import PdfReader
 from pydantic import BaseModel, Field
 from ell.types import Message, ContentBlock
+from ..config.ell_config import init_ell
+from ..llm.runner import LMPCall, call_lmp
 
 class PDFAnalysis(BaseModel):
     document_type: str = Field(description="Type of document (academic, business, technical, etc)")
@@ -14,18 +16,26 @@ class PDFAnalysis(BaseModel):
 class PDFAnalyzer:
     """Service for analyzing PDF documents"""
     
-    async def analyze(self, doc) -> Dict[str, Any]:
-        """Public method to analyze PDF document"""
+    def __init__(self):
+        init_ell()
+    
+    async def analyze(self, doc, call_llm: LMPCall = call_lmp) -> Optional[Dict[str, Any]]:
+        """Public method to analyze PDF document
+        
+        call_llm makes the LLM call, so callers can apply their own model,
+        budget and retries; None means the analysis was skipped.
+        """
+        return await call_llm(self.analyze_structure, self.sample(doc))
+    
+    def sample(self, doc) -> str:
+        """Text of the first few pages, which the analysis is based on"""
         if not doc.pdf:
             raise ValueError("PDF document not initialized")
-        return await self._analyze_structure(doc.pdf)
+        return "\n".join(page.extract_text() for page in doc.pdf.pages[:3])
     
     @ell.simple(model="gpt-4o-mini", temperature=0.2)
-    async def _analyze_structure(self, pdf: PdfReader) -> PDFAnalysis:
+    def analyze_structure(self, text_sample: str) -> PDFAnalysis:
         """Analyze PDF structure and extract key information."""
-        # Extract text from first few pages for analysis
-        text_sample = "\n".join(page.extract_text() for page in pdf.pages[:3])
-        
         # Return the analysis prompt directly - ell.simple will handle message formatting
         return f"""Analyze this PDF content and determine:
         - The document type (academic, business, technical, etc)
@@ -1,48 +1,88 @@
-from typing import List
-import pypdf
+from typing import AsyncIterator, Iterable, Iterator, List
+import logging
+import re
 from ..core.document import StarDocument
 from ..config.settings import get_settings
+from ..config.ell_config import init_ell
+from ..llm.runner import LMPCall, call_lmp
+from .extraction import select_backend
+from .packer import ChunkPacker
 import ell
 
+logger = logging.getLogger(__name__)
+
+_DELIMITED_CHUNK = re.compile(r"<<<CHUNK \d+ START>>>\n?(.*?)\n?<<<CHUNK \d+ END>>>", re.DOTALL)
+
 class PDFChunker:
     """Service for chunking PDF documents"""
     
     def __init__(self):
         self.settings = get_settings()
+        init_ell()
     
-    async def chunk(self, doc: StarDocument) -> List[str]:
-        """Split PDF into processable chunks"""
+    async def chunk(self, doc: StarDocument, call_llm: LMPCall = call_lmp) -> List[str]:
+        """Split PDF into processable chunks
+        
+        Boundaries are optimized with call_llm, so callers can apply their own
+        model, budget and retries; if it returns None they are kept as is.
+        """
         if not doc.path:
             raise ValueError("Document path is required for PDF chunking")
             
-        with open(doc.path, 'rb') as file:
-            pdf = pypdf.PdfReader(file)
-            chunks = []
-            current_chunk = []
-            current_size = 0
-            
-            for page in pdf.pages:
-                text = page.extract_text()
-                estimated_tokens = len(text) // 4
-                
-                if current_size + estimated_tokens > self.settings.max_chunk_size:
-                    # Save current chunk and start new one
-                    if current_chunk:
-                        chunks.append('\n'.join(current_chunk))
-                    current_chunk = [text]
-                    current_size = estimated_tokens
-                else:
-                    current_chunk.append(text)
-                    current_size += estimated_tokens
-            
-            # Add final chunk
-            if current_chunk:
-                chunks.append('\n'.join(current_chunk))
+        chunks = list(self._split(self._extract_pages(doc)))
+        response = await call_llm(self.optimize_chunks, ChunkPacker(self.settings).render(chunks))
+        if response is None:
+            return chunks
+        
+        # The LMP returns text, so read the chunks back out of its delimiters
+        optimized = [chunk.strip() for chunk in _DELIMITED_CHUNK.findall(str(response)) if chunk.strip()]
+        if not optimized:
+            logger.warning(f"Could not parse optimized chunks for {doc.id}, keeping the original boundaries")
+            return chunks
+        return optimized
+    
+    async def iter_chunks(self, doc: StarDocument) -> AsyncIterator[str]:
+        """Yield chunks one at a time without holding the whole document
+        
+        Used by bounded-memory mode; boundaries are not LLM-optimized since
+        that needs every chunk at once.
+        """
+        if not doc.path:
+            raise ValueError("Document path is required for PDF chunking")
+        
+        for chunk in self._split(self._extract_pages(doc)):
+            yield chunk
+    
+    def _extract_pages(self, doc: StarDocument) -> Iterator[str]:
+        """Extract page text with the backend selected for this document"""
+        backend = select_backend(doc.path)
+        doc.metadata["extraction_backend"] = backend.name
+        return backend.extract_pages(doc.path)
+    
+    def _split(self, pages: Iterable[str]) -> Iterator[str]:
+        """Group page text into chunks of roughly max_chunk_size tokens"""
+        current_chunk = []
+        current_size = 0
+        
+        for text in pages:
+            estimated_tokens = len(text) // 4
             
-            return await self._optimize_chunks(chunks)
+            if current_size + estimated_tokens > self.settings.max_chunk_size:
+                # Save current chunk and start new one
+                if current_chunk:
+                    yield '\n'.join(current_chunk)
+                current_chunk = [text]
+                current_size = estimated_tokens
+            else:
+                current_chunk.append(text)
+                current_size += estimated_tokens
+        
+        # Add final chunk
+        if current_chunk:
+            yield '\n'.join(current_chunk)
     
     @ell.simple(model="gpt-4o-mini")
-    async def _optimize_chunks(self, chunks: List[str]) -> List[str]:
+    def optimize_chunks(self, chunks: str) -> str:
         """Optimize chunk boundaries using LLM"""
         return [
             ell.system("You are a document chunking specialist."),
@@ -52,6 +92,10 @@ class PDFChunker:
             2. Avoiding mid-sentence breaks
             3. Preserving section boundaries
             
+            Each chunk is wrapped in <<<CHUNK n START>>> and <<<CHUNK n END>>>
+            lines. Return the optimized chunks wrapped the same way, numbered
+            from 1, with nothing outside the delimiters.
+            
             Chunks:
             {chunks}
             """)
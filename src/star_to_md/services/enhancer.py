@@ -1,7 +1,25 @@
-from typing import List
+from typing import Any, AsyncIterator, Dict, List, Optional
 import ell
 from ..core.document import MarkdownResult
 from ..config.settings import get_settings
+from ..config.ell_config import init_ell
+from ..llm.runner import run_lmp
+from ..llm.streaming import stream_completion
+
+ENHANCE_SYSTEM_PROMPT = """You are an expert markdown enhancer focused on:
+                         1. Clarity and readability
+                         2. Proper heading hierarchy
+                         3. Consistent formatting
+                         4. Accurate link references"""
+
+COMBINE_SYSTEM_PROMPT = """You are an expert at combining markdown sections.
+                         Ensure proper heading hierarchy and smooth transitions."""
+
+def _enhance_request(content: str) -> str:
+    return f"Enhance this markdown while preserving its structure and meaning:\n\n{content}"
+
+def _combine_request(chunks: List[str]) -> str:
+    return "Combine these markdown sections into a cohesive document:\n\n" + "\n---\n".join(chunks)
 
 class ContentEnhancer:
     """Service for enhancing markdown content with versioning and tracing"""
@@ -9,37 +27,65 @@ class ContentEnhancer:
     def __init__(self):
         self.settings = get_settings()
         # Initialize ell with storage and versioning
-        ell.init(
-            store='./logs/enhancer',
-            verbose=self.settings.debug,
-            autocommit=True
-        )
+        init_ell()
     
     @ell.simple(model="gpt-4o-mini")
-    async def enhance(self, content: str) -> str:
+    def enhance(self, content: str) -> str:
         """Enhance markdown content while preserving structure"""
         return [
-            ell.system("""You are an expert markdown enhancer focused on:
-                         1. Clarity and readability
-                         2. Proper heading hierarchy
-                         3. Consistent formatting
-                         4. Accurate link references"""),
-            ell.user(f"Enhance this markdown while preserving its structure and meaning:\n\n{content}")
+            ell.system(ENHANCE_SYSTEM_PROMPT),
+            ell.user(_enhance_request(content))
+        ]
+    
+    @ell.simple(model="gpt-4o-mini")
+    def enhance_packed(self, content: str) -> str:
+        """Enhance several delimited markdown chunks in one request"""
+        return [
+            ell.system(ENHANCE_SYSTEM_PROMPT + """
+                         The input contains several chunks, each wrapped in
+                         <<<CHUNK n START>>> and <<<CHUNK n END>>> lines.
+                         Enhance each chunk independently and return every chunk
+                         wrapped in exactly the same delimiter lines, in the same
+                         order, with nothing outside the delimiters."""),
+            ell.user(f"Enhance these markdown chunks while preserving their structure and meaning:\n\n{content}")
+        ]
+    
+    @ell.simple(model="gpt-4o-mini")
+    def revise(self, content: str) -> str:
+        """Update previously enhanced markdown for a changed source chunk"""
+        return [
+            ell.system(ENHANCE_SYSTEM_PROMPT + """
+                         You are given markdown you produced earlier for a source
+                         text, and a unified diff of how that source has since
+                         changed. Apply the same changes to the markdown and
+                         return the full updated markdown, changing nothing else."""),
+            ell.user(content)
         ]
     
     @ell.simple(model="gpt-4o-mini", temperature=0.2)
-    async def combine(self, chunks: List[str]) -> MarkdownResult:
+    def combine(self, chunks: List[str]) -> MarkdownResult:
         """Combine markdown chunks intelligently"""
         return [
-            ell.system("""You are an expert at combining markdown sections.
-                         Ensure proper heading hierarchy and smooth transitions."""),
-            ell.user("Combine these markdown sections into a cohesive document:\n\n" + 
-                    "\n---\n".join(chunks))
+            ell.system(COMBINE_SYSTEM_PROMPT),
+            ell.user(_combine_request(chunks))
         ]
     
-    @ell.simple(model="gpt-4o-mini", temperature=0.1)
+    def stream_enhance(self, content: str, api_params: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Streaming counterpart of enhance(), yielding tokens as they arrive"""
+        return stream_completion(ENHANCE_SYSTEM_PROMPT, _enhance_request(content), **(api_params or {}))
+    
+    def stream_combine(self, chunks: List[str], api_params: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """Streaming counterpart of combine(), yielding tokens as they arrive"""
+        return stream_completion(COMBINE_SYSTEM_PROMPT, _combine_request(chunks), **(api_params or {}))
+    
     async def validate_structure(self, content: str) -> bool:
         """Validate markdown structure"""
+        response = await run_lmp(self._validate_structure, content, api_params={"model": self.settings.llm_model})
+        return str(response).strip().strip(".").lower() == "true"
+    
+    @ell.simple(model="gpt-4o-mini", temperature=0.1)
+    def _validate_structure(self, content: str) -> str:
+        """Validate markdown structure, answering 'true' or 'false'"""
         return [
             ell.system("You are a markdown structure validator."),
             ell.user(f"""Validate this markdown structure. Return only 'true' or 'false'.
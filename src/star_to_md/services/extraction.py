@@ -0,0 +1,238 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from statistics import mean
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import codecs
+import json
+import logging
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+import pypdf
+from ..config.settings import get_settings
+
+try:
+    from pdfminer.high_level import extract_pages as pdfminer_extract_pages
+    from pdfminer.layout import LTTextContainer
+except ImportError:  # Optional: pip install star_to_md[pdfminer]
+    pdfminer_extract_pages = None
+
+logger = logging.getLogger(__name__)
+
+class ExtractionBackend(ABC):
+    """Extracts plain text from a PDF, one page at a time"""
+
+    name: str = None
+
+    @abstractmethod
+    def is_available(self) -> bool:
+        """Check the backend's library or executable is installed"""
+
+    @abstractmethod
+    def extract_pages(self, path: Path) -> Iterator[str]:
+        """Yield the text of each page in order"""
+
+class PypdfBackend(ExtractionBackend):
+    """In-process extraction with pypdf"""
+
+    name = "pypdf"
+
+    def is_available(self) -> bool:
+        return True
+
+    def extract_pages(self, path: Path) -> Iterator[str]:
+        with open(path, 'rb') as file:
+            for page in pypdf.PdfReader(file).pages:
+                yield page.extract_text()
+
+class PdftotextBackend(ExtractionBackend):
+    """Poppler's pdftotext, run as a subprocess"""
+
+    name = "pdftotext"
+    read_size = 64 * 1024
+
+    def is_available(self) -> bool:
+        return shutil.which('pdftotext') is not None
+
+    def extract_pages(self, path: Path) -> Iterator[str]:
+        """Yield pages as pdftotext writes them, so the whole text is never held at once"""
+        args = ['pdftotext', '-layout', '-enc', 'UTF-8', str(path), '-']
+        # stderr goes to a file: an unread pipe can fill up and stall pdftotext
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=stderr)
+            try:
+                # Pages are separated by form feeds, with one after the last page.
+                # read1() returns what is available rather than waiting for a full block
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+                pending = ""
+                for block in iter(lambda: process.stdout.read1(self.read_size), b""):
+                    *pages, pending = (pending + decoder.decode(block)).split('\f')
+                    yield from pages
+                pending += decoder.decode(b"", final=True)
+                if pending.strip():
+                    yield pending
+
+                if process.wait() != 0:
+                    stderr.seek(0)
+                    raise subprocess.CalledProcessError(
+                        process.returncode, args, stderr=stderr.read().decode('utf-8', 'replace')
+                    )
+            finally:
+                # Stop pdftotext if the caller stops reading early
+                if process.poll() is None:
+                    process.kill()
+                process.stdout.close()
+                process.wait()
+
+class PdfminerBackend(ExtractionBackend):
+    """In-process extraction with pdfminer.six's layout analysis"""
+
+    name = "pdfminer"
+
+    def is_available(self) -> bool:
+        return pdfminer_extract_pages is not None
+
+    def extract_pages(self, path: Path) -> Iterator[str]:
+        for layout in pdfminer_extract_pages(str(path)):
+            yield "".join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            )
+
+BACKENDS: Dict[str, ExtractionBackend] = {
+    backend.name: backend
+    for backend in (PypdfBackend(), PdftotextBackend(), PdfminerBackend())
+}
+
+DEFAULT_BACKEND = "pypdf"
+
+_PRODUCER_CLASSES = [
+    ("latex", re.compile(r"tex|dvips|ghostscript", re.IGNORECASE)),
+    ("office", re.compile(r"microsoft|word|libreoffice|openoffice|powerpoint", re.IGNORECASE)),
+    ("browser", re.compile(r"skia|chrom|wkhtmltopdf|webkit|prince", re.IGNORECASE)),
+    ("scanner", re.compile(r"scan|ocr|abbyy|paper ?port", re.IGNORECASE)),
+    ("design", re.compile(r"indesign|quark|illustrator|distiller", re.IGNORECASE)),
+]
+
+_WORD = re.compile(r"^[^\W\d_]{2,}[.,;:!?)]*$")
+
+def classify(path: Path) -> str:
+    """Assign a PDF to a document class based on the software that produced it"""
+    try:
+        metadata = pypdf.PdfReader(str(path)).metadata or {}
+        producer = f"{metadata.get('/Producer', '')} {metadata.get('/Creator', '')}"
+    except Exception as e:
+        logger.debug(f"Could not read PDF metadata for {path}: {str(e)}")
+        return "default"
+    for name, pattern in _PRODUCER_CLASSES:
+        if pattern.search(producer):
+            return name
+    return "default"
+
+def text_quality(text: str) -> float:
+    """Fraction of whitespace-separated tokens that look like words (0-1)"""
+    tokens = text.split()
+    if not tokens:
+        return 0.0
+    words = sum(1 for token in tokens if _WORD.match(token))
+    garbage = text.count("\ufffd") + text.count("(cid:")
+    return max(0.0, (words - garbage) / len(tokens))
+
+def load_calibration() -> Dict[str, Any]:
+    path = Path(get_settings().extraction_calibration_path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+def select_backend(path: Path) -> ExtractionBackend:
+    """Pick the extraction backend for a document
+
+    An explicitly configured backend wins; otherwise the calibrated choice
+    for the document's class is used, falling back to pypdf.
+    """
+    configured = get_settings().extraction_backend
+    if configured != "auto":
+        backend = BACKENDS.get(configured)
+        if backend is None or not backend.is_available():
+            raise ValueError(f"Extraction backend not available: {configured}")
+        return backend
+
+    choices = load_calibration().get("classes", {})
+    document_class = classify(path) if choices else "default"
+    choice = choices.get(document_class, choices.get("default", {})).get("backend", DEFAULT_BACKEND)
+    backend = BACKENDS.get(choice)
+    if backend is None or not backend.is_available():
+        backend = BACKENDS[DEFAULT_BACKEND]
+    logger.debug(f"Using {backend.name} extraction for {path} (class {document_class})")
+    return backend
+
+def benchmark(path: Path, backends: Iterable[ExtractionBackend]) -> Dict[str, Dict[str, float]]:
+    """Time each backend on a file and score its output"""
+    results = {}
+    for backend in backends:
+        started = time.perf_counter()
+        try:
+            pages = list(backend.extract_pages(path))
+        except Exception as e:
+            logger.warning(f"{backend.name} failed on {path}: {str(e)}")
+            continue
+        elapsed = time.perf_counter() - started
+        text = "\n".join(pages)
+        results[backend.name] = {
+            "seconds_per_page": elapsed / max(1, len(pages)),
+            "quality": text_quality(text),
+            "characters": len(text),
+        }
+
+    # Penalise backends that recover much less text than the best one
+    most = max((result["characters"] for result in results.values()), default=0)
+    for result in results.values():
+        coverage = result["characters"] / most if most else 0.0
+        result["quality"] = round(result["quality"] * min(1.0, coverage / 0.9), 4)
+    return results
+
+def calibrate(samples: List[Path], min_quality: Optional[float] = None) -> Dict[str, Any]:
+    """Benchmark available backends on sample files and pick one per document class
+
+    Per class, the fastest backend whose mean quality is within min_quality
+    (a ratio) of the best backend's wins. The result is saved for select_backend().
+    """
+    settings = get_settings()
+    min_quality = settings.extraction_min_quality if min_quality is None else min_quality
+    available = [backend for backend in BACKENDS.values() if backend.is_available()]
+
+    # Every sample also counts towards the default class, used for unseen classes
+    by_class: Dict[str, Dict[str, List[Dict[str, float]]]] = {"default": {}}
+    for path in samples:
+        document_class = classify(path)
+        for name, result in benchmark(path, available).items():
+            by_class["default"].setdefault(name, []).append(result)
+            if document_class != "default":
+                by_class.setdefault(document_class, {}).setdefault(name, []).append(result)
+
+    classes = {}
+    for document_class, runs in by_class.items():
+        summary = {
+            name: {
+                "seconds_per_page": mean(result["seconds_per_page"] for result in results),
+                "quality": mean(result["quality"] for result in results),
+                "samples": len(results),
+            }
+            for name, results in runs.items()
+        }
+        if not summary:
+            continue
+        best_quality = max(result["quality"] for result in summary.values())
+        acceptable = [
+            name for name, result in summary.items()
+            if result["quality"] >= best_quality * min_quality
+        ]
+        fastest = min(acceptable, key=lambda name: summary[name]["seconds_per_page"])
+        classes[document_class] = {"backend": fastest, "backends": summary}
+
+    calibration = {"min_quality": min_quality, "classes": classes}
+    path = Path(settings.extraction_calibration_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(calibration, indent=2))
+    return calibration
@@ -0,0 +1,80 @@
+from typing import Hashable, List, Optional, Sequence
+import re
+from ..config.settings import Settings, get_settings
+from .router import estimate_tokens
+
+CHUNK_START = "<<<CHUNK {index} START>>>"
+CHUNK_END = "<<<CHUNK {index} END>>>"
+
+_MARKER = re.compile(r"<<<CHUNK (\d+) (START|END)>>>")
+
+class ChunkPacker:
+    """Service for packing small chunks into a single LLM request"""
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or get_settings()
+
+    def pack(self, chunks: Sequence[str], keys: Optional[Sequence[Hashable]] = None) -> List[List[int]]:
+        """Group consecutive small chunks sharing a key, up to the pack token limit
+
+        Returns groups of chunk indices; chunks too large to pack get a group of their own.
+        """
+        keys = keys if keys is not None else [None] * len(chunks)
+        groups: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for index, chunk in enumerate(chunks):
+            tokens = estimate_tokens(chunk)
+            if tokens > self.settings.pack_small_chunk_tokens:
+                if current:
+                    groups.append(current)
+                groups.append([index])
+                current, current_tokens = [], 0
+                continue
+
+            fits = current_tokens + tokens <= self.settings.pack_max_tokens
+            if current and (not fits or keys[current[0]] != keys[index]):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            groups.append(current)
+        return groups
+
+    def render(self, chunks: Sequence[str]) -> str:
+        """Wrap each chunk in numbered delimiters"""
+        return "\n\n".join(
+            f"{CHUNK_START.format(index=i)}\n{chunk}\n{CHUNK_END.format(index=i)}"
+            for i, chunk in enumerate(chunks, start=1)
+        )
+
+    def split(self, response: str, count: int) -> Optional[List[str]]:
+        """Split a packed response back into chunks, or None if it is malformed"""
+        markers = list(_MARKER.finditer(response))
+        if len(markers) != 2 * count:
+            return None
+
+        parts = []
+        position = 0
+        for i in range(count):
+            start, end = markers[2 * i], markers[2 * i + 1]
+            expected = str(i + 1)
+            if (start.group(1), start.group(2)) != (expected, "START"):
+                return None
+            if (end.group(1), end.group(2)) != (expected, "END"):
+                return None
+            # Anything outside the delimiters means the model did not follow the format
+            if response[position:start.start()].strip():
+                return None
+            part = response[start.end():end.start()].strip()
+            if not part:
+                return None
+            parts.append(part)
+            position = end.end()
+
+        if response[position:].strip():
+            return None
+        return parts
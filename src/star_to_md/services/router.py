@@ -0,0 +1,171 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import re
+from ..config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_CELL = re.compile(r"\S+(?: \S+)*")  # Text separated by 2+ spaces
+_CODE_LINE = re.compile(
+    r"^\s*(?:"
+    r"(?:async\s+)?def\s+\w+\s*\(|class\s+\w+\s*[(:{]"  # Definitions
+    r"|function\s*\w*\s*\(|(?:const|let|var)\s+\w+\s*="
+    r"|(?:from\s+[\w.]+\s+)?import\s+[\w.*]+(?:\s*,\s*[\w.]+)*(?:\s+as\s+\w+)?;?\s*$"  # Whole-line imports
+    r"|#include\s*[<\"]"
+    r"|[{}\])]+[;,]?\s*$"  # Lines of closing or opening brackets
+    r")"
+    r"|[)\]]\s*[{;]\s*$|=>\s*\{?\s*$"  # Calls and conditions ending a statement or opening a block
+)
+_MATH = re.compile(r"[=±×÷∑∫√≤≥≈∞^_]")
+
+def _cells(line: str) -> List[Tuple[int, int]]:
+    """Spans of the cells in a line, where cells are separated by tabs, pipes or 2+ spaces"""
+    return [match.span() for match in _CELL.finditer(line.replace("\t", "  ").replace("|", " "))]
+
+def _aligned(above: List[Tuple[int, int]], below: List[Tuple[int, int]]) -> bool:
+    """Same number of cells, each starting or ending (right-aligned numbers) in the same place"""
+    return len(above) == len(below) and all(
+        abs(a_start - b_start) <= 2 or abs(a_end - b_end) <= 2
+        for (a_start, a_end), (b_start, b_end) in zip(above, below)
+    )
+
+def table_lines(lines: List[str], min_columns: int = 3, min_rows: int = 3) -> int:
+    """Count lines in runs of consecutive lines sharing aligned columns
+
+    A run needs min_rows lines of min_columns cells, so a stray double space
+    or two-column page layout is not mistaken for a table.
+    """
+    count = 0
+    run: List[List[Tuple[int, int]]] = []
+    for line in lines + [""]:
+        cells = _cells(line)
+        if len(cells) >= min_columns and run and _aligned(run[-1], cells):
+            run.append(cells)
+            continue
+        if len(run) >= min_rows:
+            count += len(run)
+        run = [cells] if len(cells) >= min_columns else []
+    return count
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate, matching the chunker's heuristic"""
+    return len(text) // 4
+
+@dataclass
+class ModelTier:
+    """A model and its call parameters"""
+    name: str
+    model: str
+    temperature: float
+
+    @property
+    def api_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature}
+
+@dataclass
+class TokenBudget:
+    """Token and cost budget for a single document"""
+    max_tokens: Optional[int] = None
+    max_cost: Optional[float] = None
+    token_costs: Dict[str, float] = field(default_factory=dict)
+    tokens_used: int = 0
+    cost_used: float = 0.0
+    exhausted: bool = False
+
+    def cost_of(self, tokens: int, model: str) -> float:
+        return tokens / 1000 * self.token_costs.get(model, 0.0)
+
+    def fits(self, tokens: int, model: str) -> bool:
+        """Check whether a call of the given size fits in the remaining budget"""
+        if self.max_tokens is not None and self.tokens_used + tokens > self.max_tokens:
+            return False
+        if self.max_cost is not None and self.cost_used + self.cost_of(tokens, model) > self.max_cost:
+            return False
+        return True
+
+    def can_afford(self, tokens: int, model: str) -> bool:
+        """Like fits(), but marks the budget exhausted on the first call that does not fit"""
+        if not self.exhausted and not self.fits(tokens, model):
+            self.exhausted = True
+        return not self.exhausted
+
+    def charge(self, tokens: int, model: str) -> float:
+        """Record spend and return the cost of this charge"""
+        cost = self.cost_of(tokens, model)
+        self.tokens_used += tokens
+        self.cost_used += cost
+        return cost
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "tokens_used": self.tokens_used,
+            "cost_used": round(self.cost_used, 6),
+            "max_tokens": self.max_tokens,
+            "max_cost": self.max_cost,
+            "exhausted": self.exhausted,
+        }
+
+class ModelRouter:
+    """Routes chunks to model tiers based on their complexity"""
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or get_settings()
+        self.tiers: Dict[str, ModelTier] = {
+            "fast": ModelTier("fast", self.settings.llm_model, self.settings.llm_temperature),
+            "strong": ModelTier("strong", self.settings.llm_strong_model, self.settings.llm_temperature),
+        }
+
+    @property
+    def default_tier(self) -> ModelTier:
+        return self.tiers["fast"]
+
+    def new_budget(self) -> TokenBudget:
+        """Create a fresh budget for one document"""
+        return TokenBudget(
+            max_tokens=self.settings.document_token_budget,
+            max_cost=self.settings.document_cost_budget,
+            token_costs=dict(self.settings.llm_token_costs),
+        )
+
+    def score(self, chunk: str, analysis: Any = None) -> float:
+        """Estimate chunk complexity (0-1) from local heuristics and analyzer output"""
+        lines = [line for line in chunk.splitlines() if line.strip()]
+        if not lines:
+            return 0.0
+
+        table_ratio = table_lines(lines) / len(lines)
+        code_ratio = sum(1 for line in lines if _CODE_LINE.search(line)) / len(lines)
+        math_ratio = min(1.0, len(_MATH.findall(chunk)) / max(1, len(chunk) // 100))
+        local = min(1.0, 1.5 * table_ratio + 1.5 * code_ratio + 0.5 * math_ratio)
+
+        analyzed = self._analysis_complexity(analysis)
+        if analyzed is None:
+            return local
+        return (local + analyzed) / 2
+
+    def route(self, chunk: str, analysis: Any = None) -> ModelTier:
+        """Pick a model tier for a chunk"""
+        score = self.score(chunk, analysis)
+        tier = self.tiers["strong"] if score >= self.settings.llm_complexity_threshold else self.default_tier
+        logger.debug(f"Routed chunk (complexity {score:.2f}) to {tier.name} tier ({tier.model})")
+        return tier
+
+    @staticmethod
+    def _analysis_complexity(analysis: Any) -> Optional[float]:
+        """Pull a complexity score out of analyzer output, if there is one"""
+        if analysis is None:
+            return None
+        if isinstance(analysis, dict):
+            value = analysis.get("estimated_complexity")
+            has_structure = analysis.get("has_tables") or analysis.get("has_code_blocks")
+        else:
+            value = getattr(analysis, "estimated_complexity", None)
+            has_structure = getattr(analysis, "has_tables", False) or getattr(analysis, "has_code_blocks", False)
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if has_structure:
+            value = max(value, 0.5)
+        return min(1.0, max(0.0, value))
@@ -0,0 +1,200 @@
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+import difflib
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+from ..config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_PRIME = (1 << 61) - 1
+_MONTHS = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = re.compile(
+    r"\b\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}\b"
+    rf"|\b{_MONTHS}\s+\d{{1,2}}(st|nd|rd|th)?,?\s+\d{{4}}\b"
+    rf"|\b\d{{1,2}}(st|nd|rd|th)?\s+{_MONTHS}\s+\d{{4}}\b",
+    re.IGNORECASE
+)
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+_PUNCTUATION = re.compile(r"[^\w<>]+")
+
+def normalize(text: str) -> str:
+    """Lowercase, mask dates and numbers, and drop punctuation and extra whitespace"""
+    text = _DATE.sub(" <date> ", text.lower())
+    text = _NUMBER.sub(" <num> ", text)
+    return " ".join(_PUNCTUATION.sub(" ", text).split())
+
+def shingles(normalized: str, size: int = 3) -> Set[str]:
+    """Word n-grams of normalized text"""
+    words = normalized.split()
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def source_diff(old: str, new: str) -> str:
+    """Unified diff between two versions of a chunk's source text"""
+    return "\n".join(difflib.unified_diff(
+        old.splitlines(), new.splitlines(), "previous", "current", n=1, lineterm=""
+    ))
+
+def revision_request(markdown: str, diff: str) -> str:
+    """Prompt asking for previous markdown to be updated with a source diff"""
+    return f"Previous markdown:\n\n{markdown}\n\nSource changes:\n\n{diff}"
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+def source_hash(source: str) -> str:
+    """Hash of a chunk's source with whitespace collapsed, identifying exact matches"""
+    return hashlib.blake2b(" ".join(source.split()).encode("utf-8"), digest_size=16).hexdigest()
+
+class MinHasher:
+    """MinHash signatures from a fixed family of random hash permutations"""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features: Set[str]) -> List[int]:
+        hashes = [_hash(feature) for feature in features]
+        if not hashes:
+            return [_PRIME] * len(self.params)
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self.params]
+
+@dataclass
+class SimilarChunk:
+    """A previously converted chunk close to the one being looked up"""
+    source: str
+    markdown: str
+    similarity: float
+    exact: bool  # Differs from the looked-up chunk only in whitespace
+
+class SimilarityIndex:
+    """Persistent MinHash/LSH index of converted chunks, shared across documents and runs"""
+
+    def __init__(self, settings: Settings = None):
+        self.settings = settings or get_settings()
+        if self.settings.similarity_num_perm % self.settings.similarity_bands:
+            raise ValueError("similarity_num_perm must be a multiple of similarity_bands")
+        self.bands = self.settings.similarity_bands
+        self.rows = self.settings.similarity_num_perm // self.bands
+        self.hasher = MinHasher(self.settings.similarity_num_perm)
+
+        path = Path(self.settings.similarity_index_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path))
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                markdown TEXT NOT NULL,
+                source_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                bucket TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);
+        """)
+        self._migrate()
+        self.db.execute("CREATE INDEX IF NOT EXISTS chunks_source_hash ON chunks (source_hash)")
+        self.db.commit()
+
+    def _migrate(self) -> None:
+        """Add and fill the source_hash column in indexes created before it existed"""
+        columns = {name for _, name, *_ in self.db.execute("PRAGMA table_info(chunks)")}
+        if "source_hash" in columns:
+            return
+        self.db.execute("ALTER TABLE chunks ADD COLUMN source_hash TEXT")
+        self.db.executemany(
+            "UPDATE chunks SET source_hash = ? WHERE id = ?",
+            [(source_hash(source), chunk_id) for chunk_id, source in self.db.execute("SELECT id, source FROM chunks")]
+        )
+
+    def lookup(self, source: str, max_candidates: int = 20) -> Optional[SimilarChunk]:
+        """Find the most similar stored chunk at or above the configured threshold
+
+        An exact match (up to whitespace) is looked up first, since masking
+        numbers makes chunks differing only in e.g. page numbers tie at 1.0.
+        """
+        exact = self.db.execute(
+            "SELECT source, markdown FROM chunks WHERE source_hash = ? ORDER BY id LIMIT 1", (source_hash(source),)
+        ).fetchone()
+        if exact is not None:
+            logger.debug("Found exact duplicate chunk")
+            return SimilarChunk(source=exact[0], markdown=exact[1], similarity=1.0, exact=True)
+
+        normalized = normalize(source)
+        features = shingles(normalized)
+
+        hits: Counter = Counter()
+        for band, bucket in enumerate(self._buckets(self.hasher.signature(features))):
+            rows = self.db.execute(
+                "SELECT chunk_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)
+            )
+            hits.update(chunk_id for (chunk_id,) in rows)
+
+        best = None
+        for chunk_id, _ in hits.most_common(max_candidates):
+            stored_source, stored_normalized, markdown = self.db.execute(
+                "SELECT source, normalized, markdown FROM chunks WHERE id = ?", (chunk_id,)
+            ).fetchone()
+            similarity = jaccard(features, shingles(stored_normalized))
+            if similarity < self.settings.similarity_threshold:
+                continue
+            candidate = SimilarChunk(
+                source=stored_source,
+                markdown=markdown,
+                similarity=similarity,
+                exact=" ".join(stored_source.split()) == " ".join(source.split())
+            )
+            # On equal similarity prefer an exact match
+            if best is None or (candidate.similarity, candidate.exact) > (best.similarity, best.exact):
+                best = candidate
+        if best is not None:
+            logger.debug(f"Found near-duplicate chunk (similarity {best.similarity:.2f}, exact={best.exact})")
+        return best
+
+    def add(self, source: str, markdown: str) -> None:
+        """Store a converted chunk, unless the same source is already stored"""
+        digest = source_hash(source)
+        if self.db.execute("SELECT 1 FROM chunks WHERE source_hash = ?", (digest,)).fetchone():
+            return
+        normalized = normalize(source)
+        cursor = self.db.execute(
+            "INSERT INTO chunks (source, normalized, markdown, source_hash) VALUES (?, ?, ?, ?)",
+            (source, normalized, markdown, digest)
+        )
+        self.db.executemany(
+            "INSERT INTO buckets (band, bucket, chunk_id) VALUES (?, ?, ?)",
+            [
+                (band, bucket, cursor.lastrowid)
+                for band, bucket in enumerate(self._buckets(self.hasher.signature(shingles(normalized))))
+            ]
+        )
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def _buckets(self, signature: List[int]) -> List[str]:
+        """LSH: hash each band of rows of the signature into a bucket key"""
+        return [
+            hashlib.blake2b(
+                ",".join(map(str, signature[band * self.rows:(band + 1) * self.rows])).encode(),
+                digest_size=8
+            ).hexdigest()
+            for band in range(self.bands)
+        ]
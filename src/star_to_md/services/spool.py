@@ -0,0 +1,45 @@
+from typing import Callable, Optional
+import tempfile
+
+class ChunkSpool:
+    """Spills finished markdown chunks to a temporary file instead of memory"""
+    
+    def __init__(self, directory: Optional[str] = None, separator: str = "\n\n"):
+        self.separator = separator
+        self.count = 0
+        self.bytes_written = 0
+        self._file = tempfile.TemporaryFile(mode="w+", encoding="utf-8", dir=directory)
+    
+    def append(self, chunk: str) -> None:
+        """Write a finished chunk to disk"""
+        if self.count:
+            self._file.write(self.separator)
+        self._file.write(chunk)
+        self.count += 1
+        self.bytes_written += len(chunk)
+    
+    def replay(self, write: Callable[[str], None], block_size: int = 64 * 1024) -> None:
+        """Stream the spooled document to a writer in fixed-size blocks"""
+        self._file.flush()
+        self._file.seek(0)
+        while True:
+            block = self._file.read(block_size)
+            if not block:
+                break
+            write(block)
+        self._file.seek(0, 2)
+    
+    def read_all(self) -> str:
+        """Load the whole spooled document into memory"""
+        parts = []
+        self.replay(parts.append)
+        return "".join(parts)
+    
+    def close(self) -> None:
+        self._file.close()
+    
+    def __enter__(self) -> "ChunkSpool":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,48 @@
+from pathlib import Path
+from typing import Optional
+import logging
+
+try:
+    import magic
+except ImportError:  # python-magic needs the libmagic system library
+    magic = None
+
+logger = logging.getLogger(__name__)
+
+MIME_FORMATS = {
+    "application/pdf": "pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+    "text/html": "html",
+    "application/xhtml+xml": "html",
+    "application/epub+zip": "epub",
+    "application/vnd.oasis.opendocument.text": "odt",
+    "text/x-tex": "latex",
+    "application/x-tex": "latex",
+}
+
+EXTENSION_FORMATS = {
+    ".pdf": "pdf",
+    ".docx": "docx",
+    ".html": "html",
+    ".htm": "html",
+    ".xhtml": "html",
+    ".epub": "epub",
+    ".odt": "odt",
+    ".rst": "rst",
+    ".tex": "latex",
+    ".latex": "latex",
+}
+
+def detect_format(path: Path) -> Optional[str]:
+    """Detect a document's format from its content, falling back to the extension"""
+    if magic is not None:
+        try:
+            mime = magic.from_file(str(path), mime=True)
+            if mime in MIME_FORMATS:
+                return MIME_FORMATS[mime]
+            logger.debug(f"Unmapped MIME type {mime} for {path}, using extension")
+        except (OSError, magic.MagicException) as e:
+            logger.debug(f"MIME detection failed for {path}: {str(e)}")
+    
+    # Container formats (docx, epub, odt) can report as plain zip, and rst as plain text
+    return EXTENSION_FORMATS.get(Path(path).suffix.lower())
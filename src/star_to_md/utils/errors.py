@@ -1,9 +1,6 @@
-import ell
 from typing import Optional, Dict
 from dataclasses import dataclass, field
-from pathlib import Path
 import logging
-from ..config.ell_config import init_ell
 
 logger = logging.getLogger(__name__)
 
@@ -36,47 +33,22 @@ class ValidationError(Exception):
     document_id: str
     source: Optional[Exception] = None
 
+@dataclass
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open"""
+    message: str
+    retry_after: float = 0.0
+    
+    def __str__(self) -> str:
+        return f"{self.message} (retry after {self.retry_after:.1f}s)"
+
 class ErrorHandler:
     """Centralized error handling"""
     
-    def __init__(self):
-        # Ensure logs directory exists
-        log_dir = Path('./logs')
-        log_dir.mkdir(exist_ok=True)
-        init_ell()  # Initialize ell if not already initialized
-    
     async def handle_error(self, error: Exception) -> Optional[str]:
-        """Handle errors with potential recovery"""
-        try:
-            if isinstance(error, ProcessorError):
-                return await self._handle_processor_error(error)
-            elif isinstance(error, ValidationError):
-                return await self._handle_validation_error(error)
-            return None
-        except Exception as e:
-            logger.error(f"Error during error handling: {str(e)}")
-            return None
-        
-    @ell.simple(model="gpt-4o-mini")
-    async def _handle_processor_error(self, error: ProcessorError) -> Optional[str]:
-        """Attempt to recover from processor errors"""
-        return {
-            "messages": [
-                {"role": "system", "content": "You are an error recovery specialist."},
-                {"role": "user", "content": f"Error: {error.message}\n"
-                         f"Processor: {error.processor_name}\n\n"
-                         f"Attempt to recover from this error and suggest a solution."}
-            ]
-        }
-    
-    @ell.simple(model="gpt-4o-mini")
-    async def _handle_validation_error(self, error: ValidationError) -> Optional[str]:
-        """Attempt to recover from validation errors"""
-        error_list = '\n'.join(f'- {k}: {v}' for k, v in error.validation_errors.items())
-        return {
-            "messages": [
-                {"role": "system", "content": "You are a validation error recovery specialist."},
-                {"role": "user", "content": f"Validation Errors:\n{error_list}\n\n"
-                         f"Attempt to recover from these validation errors and suggest solutions."}
-            ]
-        }
+        """Log an error; recovery is left to retries, the circuit breaker and pandoc fallbacks"""
+        if isinstance(error, (ProcessorError, ValidationError, ConversionError)):
+            logger.error(f"{type(error).__name__}: {str(error)}")
+        else:
+            logger.exception(f"Unexpected error: {str(error)}", exc_info=error)
+        return None
@@ -1,18 +1,32 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List
 import logging
 import os
-from pathlib import Path
 
-# Configure logging
-log_dir = Path('./logs')
-log_dir.mkdir(exist_ok=True)
-logging.basicConfig(
-    filename=log_dir / 'star_to_md.log',
-    level=logging.ERROR,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+logger = logging.getLogger(__name__)
+
+def rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MiB, where /proc reports it
+    
+    Unlike ru_maxrss, which is the peak over the whole process lifetime, this
+    can be sampled during a conversion to find that conversion's own peak.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):  # Not Linux
+        return None
+
+@dataclass
+class TierUsage:
+    """LLM spend and latency for a single model tier"""
+    model: str
+    calls: int = 0
+    tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0  # Total seconds spent waiting on the model
 
 @dataclass
 class ConversionMetrics:
@@ -20,10 +34,40 @@ class ConversionMetrics:
     document_id: str
     start_time: datetime
     end_time: Optional[datetime] = None
+    first_byte_time: Optional[datetime] = None
     chunks_processed: int = 0
     llm_calls: int = 0
     token_usage: Dict[str, int] = field(default_factory=dict)
     errors: List[str] = field(default_factory=list)
+    tier_usage: Dict[str, TierUsage] = field(default_factory=dict)
+    packed_requests: int = 0
+    packed_chunks: int = 0
+    pack_fallbacks: int = 0
+    hedged_requests: int = 0
+    hedges_won: int = 0
+    retries: int = 0
+    similarity_lookups: int = 0
+    chunks_reused: int = 0
+    chunks_revised: int = 0
+    fallbacks: Dict[str, int] = field(default_factory=dict)
+    circuit_state: Optional[str] = None
+    circuit_trips: int = 0
+    peak_rss_mb: Optional[float] = None  # Highest RSS sampled during the conversion
+    http_pool: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    
+    @property
+    def time_to_first_byte(self) -> Optional[float]:
+        """Seconds from start until the first output was written"""
+        if self.first_byte_time is None:
+            return None
+        return (self.first_byte_time - self.start_time).total_seconds()
+    
+    @property
+    def reuse_rate(self) -> Optional[float]:
+        """Share of looked-up chunks answered from the similarity index"""
+        if not self.similarity_lookups:
+            return None
+        return (self.chunks_reused + self.chunks_revised) / self.similarity_lookups
 
 class MetricsCollector:
     """Collects and reports metrics"""
@@ -36,14 +80,111 @@ class MetricsCollector:
             document_id=document_id,
             start_time=datetime.now()
         )
+        self.sample_rss(document_id)
     
     def end_conversion(self, document_id: str) -> None:
         if document_id in self.metrics:
             self.metrics[document_id].end_time = datetime.now()
+            self.sample_rss(document_id)
+    
+    def sample_rss(self, document_id: str) -> Optional[float]:
+        """Sample the current RSS, returning the conversion's peak so far"""
+        if document_id not in self.metrics:
+            return None
+        metrics = self.metrics[document_id]
+        current = rss_mb()
+        if current is not None:
+            metrics.peak_rss_mb = max(metrics.peak_rss_mb or 0.0, current)
+        return metrics.peak_rss_mb
     
     def add_error(self, document_id: str, error: str) -> None:
         if document_id in self.metrics:
             self.metrics[document_id].errors.append(error)
             # Log error to file
-            logging.error(f"Document {document_id}: {error}")
-    
\ No newline at end of file
+            logger.error(f"Document {document_id}: {error}")
+    
+    def add_token_usage(self, document_id: str, tokens: int, key: str = "total") -> None:
+        if document_id in self.metrics:
+            usage = self.metrics[document_id].token_usage
+            usage[key] = usage.get(key, 0) + tokens
+    
+    def record_llm_call(
+        self,
+        document_id: str,
+        tier: str,
+        model: str,
+        tokens: int,
+        cost: float,
+        latency: float
+    ) -> None:
+        """Record spend and latency of one LLM call against its model tier"""
+        if document_id not in self.metrics:
+            return
+        metrics = self.metrics[document_id]
+        metrics.llm_calls += 1
+        usage = metrics.tier_usage.setdefault(tier, TierUsage(model=model))
+        usage.calls += 1
+        usage.tokens += tokens
+        usage.cost += cost
+        usage.latency += latency
+        self.add_token_usage(document_id, tokens, key=model)
+    
+    def record_pack(self, document_id: str, chunks: int, split_ok: bool) -> None:
+        """Record a packed request and whether its response split cleanly"""
+        if document_id not in self.metrics:
+            return
+        metrics = self.metrics[document_id]
+        metrics.packed_requests += 1
+        metrics.packed_chunks += chunks
+        if not split_ok:
+            metrics.pack_fallbacks += 1
+    
+    def record_hedge(self, document_id: str, won: bool) -> None:
+        """Record a hedged request and whether the duplicate finished first"""
+        if document_id not in self.metrics:
+            return
+        self.metrics[document_id].hedged_requests += 1
+        if won:
+            self.metrics[document_id].hedges_won += 1
+    
+    def record_similarity(self, document_id: str, outcome: str) -> None:
+        """Record a similarity index lookup and its outcome (reused, revised or miss)"""
+        if document_id not in self.metrics:
+            return
+        metrics = self.metrics[document_id]
+        metrics.similarity_lookups += 1
+        if outcome == "reused":
+            metrics.chunks_reused += 1
+        elif outcome == "revised":
+            metrics.chunks_revised += 1
+    
+    def record_first_byte(self, document_id: str) -> None:
+        """Record when output first reached the user"""
+        if document_id in self.metrics and self.metrics[document_id].first_byte_time is None:
+            self.metrics[document_id].first_byte_time = datetime.now()
+    
+    def record_retry(self, document_id: str) -> None:
+        if document_id in self.metrics:
+            self.metrics[document_id].retries += 1
+    
+    def record_fallback(self, document_id: str, reason: str) -> None:
+        """Record output that skipped the LLM (budget spent, provider unavailable, ...)"""
+        if document_id in self.metrics:
+            fallbacks = self.metrics[document_id].fallbacks
+            fallbacks[reason] = fallbacks.get(reason, 0) + 1
+    
+    def fallback_count(self, document_id: str) -> int:
+        if document_id not in self.metrics:
+            return 0
+        return sum(self.metrics[document_id].fallbacks.values())
+    
+    def record_circuit(self, document_id: str, snapshot: Dict[str, Any]) -> None:
+        """Record the shared circuit breaker's state"""
+        if document_id in self.metrics:
+            self.metrics[document_id].circuit_state = snapshot["state"]
+            self.metrics[document_id].circuit_trips = snapshot["trips"]
+    
+    def record_pool(self, document_id: str, stats: Dict[str, Dict[str, Any]]) -> None:
+        """Record usage of the shared LLM HTTP connection pools during the conversion"""
+        if document_id in self.metrics:
+            self.metrics[document_id].http_pool = stats
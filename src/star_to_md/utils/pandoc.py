@@ -1,5 +1,6 @@
 import shutil
 import subprocess
+from pathlib import Path
 from typing import Optional
 from ..config.settings import get_settings
 
@@ -39,3 +40,17 @@ def check_pandoc_version() -> Optional[str]:
 def is_pandoc_available() -> bool:
     """Check if pandoc is available for use"""
     return get_pandoc_path() is not None
+
+def convert_file(path: Path, from_format: str, to_format: str = 'markdown') -> str:
+    """Convert a file pandoc reads natively and return the output"""
+    pandoc_path = get_pandoc_path()
+    if not pandoc_path:
+        raise FileNotFoundError("pandoc executable not found")
+    
+    result = subprocess.run(
+        [pandoc_path, str(path), '-f', from_format, '-t', to_format],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return result.stdout
@@ -0,0 +1,210 @@
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+
+# The profiler of the run in progress, picked up by worker threads
+_running: Optional["PipelineProfiler"] = None
+
+@contextmanager
+def profile_worker() -> Iterator[None]:
+    """Profile CPU in a worker thread while a PipelineProfiler is running
+
+    cProfile only sees the thread that enabled it, so each worker thread gets
+    its own profile, merged into the report. From Python 3.12 one profile
+    covers every thread and enabling another fails, so none is needed.
+    """
+    profiler = _running
+    profile = profiler._enable_worker() if profiler is not None else None
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+
+@dataclass
+class StageTiming:
+    """Wall-clock time spent inside one pipeline stage"""
+    calls: int = 0
+    total: float = 0.0
+    longest: float = 0.0
+
+@dataclass
+class BlockingEvent:
+    """An interval where the event loop could not run callbacks on time"""
+    at: float  # Seconds since profiling started
+    lag: float  # Seconds the loop was late
+    stages: List[str] = field(default_factory=list)
+
+class PipelineProfiler:
+    """Collects CPU, per-stage wall-clock, allocation and event-loop blocking data
+
+    Stage timings are wall-clock, so time spent awaiting pandoc or the LLM is
+    attributed to the stage that awaited it. Concurrent stages overlap, so
+    their totals can add up to more than the run's wall time.
+    """
+
+    def __init__(self, lag_interval: float = 0.05, lag_threshold: float = 0.1, top_allocations: int = 25):
+        self.lag_interval = lag_interval
+        self.lag_threshold = lag_threshold
+        self.top_allocations = top_allocations
+        self.stages: Dict[str, StageTiming] = {}
+        self.blocking: List[BlockingEvent] = []
+        self._active: Counter = Counter()
+        self._cpu = cProfile.Profile()
+        self._workers: List[cProfile.Profile] = []
+        self._workers_lock = threading.Lock()
+        self._local = threading.local()
+        self._started: Optional[float] = None
+        self._wall: float = 0.0
+        self._monitor: Optional[asyncio.Task] = None
+        self._heartbeat = 0.0
+        self._stalled_stages: set = set()
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    async def start(self) -> None:
+        """Start profiling"""
+        global _running
+        _running = self
+        self._started = time.perf_counter()
+        tracemalloc.start(10)
+        self._cpu.enable()
+        self._heartbeat = self._started
+        self._monitor = asyncio.ensure_future(self._watch_loop())
+        self._watchdog = threading.Thread(target=self._watch_stalls, name="profiler-watchdog", daemon=True)
+        self._watchdog.start()
+        # Let the monitor take its first reading before the pipeline runs
+        await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        """Stop profiling and capture the allocation snapshot"""
+        global _running
+        _running = None
+        self._cpu.disable()
+        self._stopping.set()
+        if self._watchdog:
+            self._watchdog.join()
+        if self._monitor:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+        self._snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self._wall = time.perf_counter() - self._started
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage, including anything it awaits"""
+        self._active[name] += 1
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._active[name] -= 1
+            timing = self.stages.setdefault(name, StageTiming())
+            timing.calls += 1
+            timing.total += elapsed
+            timing.longest = max(timing.longest, elapsed)
+
+    async def _watch_loop(self) -> None:
+        """Sleep in short intervals and record how late the loop wakes us"""
+        while True:
+            expected = time.perf_counter() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self._heartbeat = time.perf_counter()
+            lag = self._heartbeat - expected
+            if lag >= self.lag_threshold:
+                stages, self._stalled_stages = self._stalled_stages, set()
+                self.blocking.append(BlockingEvent(
+                    at=round(expected - self._started, 3),
+                    lag=round(lag, 3),
+                    stages=sorted(stages)
+                ))
+
+    def _enable_worker(self) -> Optional[cProfile.Profile]:
+        """Enable this thread's profile, or return None if the main one covers it"""
+        profile = getattr(self._local, "profile", None)
+        created = profile is None
+        if created:
+            profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profile is active (Python 3.12+)
+            return None
+        if created:
+            self._local.profile = profile
+            with self._workers_lock:
+                self._workers.append(profile)
+        return profile
+
+    def _watch_stalls(self) -> None:
+        """Note which stages are active while the loop is stalled
+
+        Runs in a thread, since nothing on the loop can run during a stall.
+        """
+        while not self._stopping.wait(self.lag_interval / 2):
+            if time.perf_counter() - self._heartbeat > self.lag_interval + self.lag_threshold:
+                self._stalled_stages.update(name for name, count in list(self._active.items()) if count > 0)
+
+    def write(self, directory: Path) -> None:
+        """Write the profile to a directory"""
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # CPU profile of the loop and worker threads, loadable with pstats or
+        # snakeviz, plus a text summary
+        summary = io.StringIO()
+        cpu = pstats.Stats(self._cpu, stream=summary)
+        for profile in self._workers:
+            cpu.add(profile)
+        cpu.dump_stats(str(directory / "cpu.prof"))
+        cpu.sort_stats("cumulative").print_stats(40)
+        (directory / "cpu.txt").write_text(summary.getvalue())
+
+        stages = {
+            name: {**asdict(timing), "share": round(timing.total / self._wall, 3) if self._wall else None}
+            for name, timing in sorted(self.stages.items(), key=lambda item: -item[1].total)
+        }
+        (directory / "stages.json").write_text(json.dumps({"wall_time": self._wall, "stages": stages}, indent=2))
+
+        lines = []
+        if self._snapshot is not None:
+            snapshot = self._snapshot.filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            for stat in snapshot.statistics("lineno")[:self.top_allocations]:
+                lines.append(str(stat))
+        (directory / "memory.txt").write_text("\n".join(lines) + "\n")
+
+        blocked = sum(event.lag for event in self.blocking)
+        (directory / "blocking.json").write_text(json.dumps({
+            "threshold": self.lag_threshold,
+            "total_blocked": round(blocked, 3),
+            "events": [asdict(event) for event in self.blocking]
+        }, indent=2))
+
+        report = [
+            f"Wall time: {self._wall:.2f}s",
+            f"CPU profile: event loop thread and {len(self._workers)} LMP worker threads",
+            "",
+            "Stages (wall-clock, may overlap):"
+        ]
+        for name, timing in stages.items():
+            report.append(f"  {name:<24} {timing['total']:8.2f}s  {timing['calls']:5d} calls  longest {timing['longest']:.2f}s")
+        report += ["", f"Event loop blocked {len(self.blocking)} times for {blocked:.2f}s in total"]
+        report += ["", "Top allocations:"] + [f"  {line}" for line in lines[:10]]
+        (directory / "report.txt").write_text("\n".join(report) + "\n")
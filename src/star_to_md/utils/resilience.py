@@ -0,0 +1,153 @@
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Tuple, Type, TypeVar, Union
+import asyncio
+import logging
+import random
+import time
+import openai
+from ..config.settings import get_settings
+from .errors import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+TRANSIENT_ERRORS = (
+    asyncio.TimeoutError,
+    ConnectionError,
+    TimeoutError,
+    openai.APIConnectionError,  # Includes APITimeoutError
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+def error_chain(error: BaseException) -> Iterator[BaseException]:
+    """Yield an error and the errors it wraps (.source, then __cause__)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = getattr(error, "source", None) or error.__cause__
+
+def caused_by(
+    error: BaseException,
+    types: Union[Type[BaseException], Tuple[Type[BaseException], ...]]
+) -> bool:
+    """Check whether an error, or any error it wraps, is one of the given types"""
+    return any(isinstance(inner, types) for inner in error_chain(error))
+
+def is_transient(error: BaseException) -> bool:
+    """Check whether an error is worth retrying
+
+    The whole chain is checked: openai wraps the httpx error that caused a
+    connection failure, so the innermost error is not the one listed.
+    """
+    return caused_by(error, TRANSIENT_ERRORS)
+
+async def retry_with_jitter(
+    factory: Callable[[], Awaitable[T]],
+    attempts: Optional[int] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+    on_retry: Optional[Callable[[BaseException], None]] = None
+) -> T:
+    """Retry transient failures with exponential backoff and full jitter"""
+    settings = get_settings()
+    # Always make at least one attempt, even with retries configured off
+    attempts = max(1, settings.llm_retry_attempts if attempts is None else attempts)
+    base_delay = settings.llm_retry_base_delay if base_delay is None else base_delay
+    max_delay = settings.llm_retry_max_delay if max_delay is None else max_delay
+
+    for attempt in range(attempts):
+        try:
+            return await factory()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_transient(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            logger.debug(f"Transient error ({type(e).__name__}), retrying in {delay:.2f}s")
+            if on_retry:
+                on_retry(e)
+            await asyncio.sleep(delay)
+
+class CircuitBreaker:
+    """Stops calling the LLM provider after repeated transient failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.opened_at: Optional[float] = None
+        self._trial_running = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(message="LLM circuit open", retry_after=self._retry_after())
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            # Let a single trial request probe the provider
+            if self._trial_running:
+                raise CircuitOpenError(message="LLM circuit half-open", retry_after=self._retry_after())
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_running = False
+
+    def record_failure(self, error: BaseException) -> None:
+        self._trial_running = False
+        if not is_transient(error):
+            # The provider answered; the request itself was bad
+            self.state = self.CLOSED
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trip()
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run factory() through the breaker"""
+        self.before_call()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self._trial_running = False
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+    def _trip(self) -> None:
+        if self.state != self.OPEN:
+            self.trips += 1
+            logger.warning(f"LLM circuit opened after {self.failures} transient failures")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def _retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+@lru_cache
+def get_circuit_breaker() -> CircuitBreaker:
+    """Circuit breaker shared by all processors"""
+    settings = get_settings()
+    return CircuitBreaker(
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout=settings.circuit_reset_timeout
+    )
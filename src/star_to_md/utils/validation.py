@@ -0,0 +1,23 @@
+from typing import List
+import re
+
+_RAW_HTML = re.compile(r"</?(div|span|table|font|style|script)\b", re.IGNORECASE)
+_FENCED_DIV = re.compile(r"^:::", re.MULTILINE)
+_HEADING = re.compile(r"^#{1,6} \S|^\S.*\n(=+|-+)\s*$", re.MULTILINE)  # ATX or setext
+
+def check_markdown_quality(content: str) -> List[str]:
+    """Cheap local checks on converted markdown, returning the names of failed checks"""
+    stripped = content.strip()
+    if not stripped:
+        return ["empty"]
+    
+    issues = []
+    lines = stripped.splitlines()
+    markup_lines = len(_RAW_HTML.findall(stripped)) + len(_FENCED_DIV.findall(stripped))
+    if markup_lines / len(lines) > 0.1:
+        issues.append("leftover_markup")
+    if stripped.count("\ufffd") / len(stripped) > 0.001:
+        issues.append("encoding_errors")
+    if len(stripped) > 2000 and not _HEADING.search(stripped):
+        issues.append("no_headings")
+    return issues
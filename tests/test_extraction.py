@@ -0,0 +1,50 @@
+import os
+import stat
+import subprocess
+import sys
+import pytest
+from star_to_md.services.extraction import PdftotextBackend
+
+# Stands in for pdftotext: writes the first page, then the rest once the
+# test creates the "go" file, so pages can only arrive in time if streamed
+FAKE_PDFTOTEXT = """#!{python}
+import os, sys, time
+go, status = os.environ["FAKE_GO"], int(os.environ.get("FAKE_STATUS", "0"))
+sys.stdout.write("page one\\f")
+sys.stdout.flush()
+deadline = time.time() + 5
+while not os.path.exists(go) and time.time() < deadline:
+    time.sleep(0.01)
+if not os.path.exists(go):
+    sys.exit(3)
+sys.stdout.write("page two\\f\\fpage four\\f")
+sys.stderr.write("Syntax Warning: broken xref\\n" * 10000)
+sys.exit(status)
+"""
+
+@pytest.fixture
+def fake_pdftotext(tmp_path, monkeypatch):
+    script = tmp_path / "pdftotext"
+    script.write_text(FAKE_PDFTOTEXT.format(python=sys.executable))
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_GO", str(tmp_path / "go"))
+    return tmp_path / "go"
+
+def test_pages_are_streamed(fake_pdftotext):
+    pages = PdftotextBackend().extract_pages("doc.pdf")
+    assert next(pages) == "page one"
+    fake_pdftotext.touch()
+    assert list(pages) == ["page two", "", "page four"]
+
+def test_failure_raises_with_stderr(fake_pdftotext, monkeypatch):
+    monkeypatch.setenv("FAKE_STATUS", "1")
+    fake_pdftotext.touch()
+    with pytest.raises(subprocess.CalledProcessError) as raised:
+        list(PdftotextBackend().extract_pages("doc.pdf"))
+    assert "broken xref" in raised.value.stderr
+
+def test_stopping_early_ends_the_process(fake_pdftotext):
+    pages = PdftotextBackend().extract_pages("doc.pdf")
+    assert next(pages) == "page one"
+    pages.close()
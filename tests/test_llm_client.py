@@ -0,0 +1,33 @@
+import asyncio
+import pytest
+from star_to_md.llm import client as client_module
+from star_to_md.llm.client import LLMClient
+
+@pytest.fixture
+def reply(monkeypatch):
+    calls = []
+
+    def set_reply(text):
+        async def run_lmp(lmp, content, api_params=None):
+            calls.append((lmp.__name__, api_params))
+            return text
+        monkeypatch.setattr(client_module, "run_lmp", run_lmp)
+        return calls
+    return set_reply
+
+@pytest.mark.parametrize("text", [
+    '{"valid": false, "issues": ["skipped heading level"]}',
+    '```json\n{"valid": false, "issues": ["skipped heading level"]}\n```',
+])
+def test_validate_markdown_parses_json(reply, text):
+    calls = reply(text)
+    result = asyncio.run(LLMClient().validate_markdown("# a\n### b"))
+    assert result == {"valid": False, "issues": ["skipped heading level"]}
+    assert calls[0][0] == "_validate_markdown"
+    assert calls[0][1] == {"model": LLMClient().settings.llm_model}
+
+def test_validate_markdown_unreadable_response(reply):
+    reply("Looks fine to me!")
+    result = asyncio.run(LLMClient().validate_markdown("# a"))
+    assert result["valid"] is False
+    assert "Looks fine to me!" in result["issues"][0]
@@ -0,0 +1,34 @@
+import sys
+import pytest
+from star_to_md.utils import monitoring
+from star_to_md.utils.monitoring import MetricsCollector, rss_mb
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads /proc")
+def test_rss_is_current_not_lifetime_peak():
+    before = rss_mb()
+    ballast = bytearray(64 * 1024 * 1024)
+    ballast[::4096] = b"x" * len(ballast[::4096])  # Touch every page
+    during = rss_mb()
+    del ballast
+    assert during - before > 32
+    assert rss_mb() < during
+
+def test_peak_is_tracked_per_conversion(monkeypatch):
+    samples = iter([100.0, 400.0, 150.0, 120.0, 130.0])
+    monkeypatch.setattr(monitoring, "rss_mb", lambda: next(samples))
+    metrics = MetricsCollector()
+
+    metrics.start_conversion("big")
+    metrics.sample_rss("big")
+    metrics.end_conversion("big")
+    metrics.start_conversion("small")
+    metrics.end_conversion("small")
+
+    assert metrics.metrics["big"].peak_rss_mb == 400.0
+    assert metrics.metrics["small"].peak_rss_mb == 130.0
+
+def test_rss_unavailable(monkeypatch):
+    monkeypatch.setattr(monitoring, "rss_mb", lambda: None)
+    metrics = MetricsCollector()
+    metrics.start_conversion("d")
+    assert metrics.sample_rss("d") is None
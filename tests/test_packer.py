@@ -0,0 +1,57 @@
+import pytest
+from star_to_md.config.settings import Settings
+from star_to_md.services.packer import ChunkPacker
+
+@pytest.fixture
+def packer():
+    return ChunkPacker(Settings())
+
+def test_split_round_trip(packer):
+    chunks = ["# One\n\nfirst", "second", "third\n\n- item"]
+    assert packer.split(packer.render(chunks), len(chunks)) == chunks
+
+@pytest.mark.parametrize("response", [
+    # Missing the second chunk
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>",
+    # An extra chunk
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>\n"
+    "<<<CHUNK 3 START>>>\nc\n<<<CHUNK 3 END>>>",
+    # An END marker dropped
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>",
+])
+def test_split_rejects_wrong_marker_count(packer, response):
+    assert packer.split(response, 2) is None
+
+@pytest.mark.parametrize("response", [
+    # Chunks swapped
+    "<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>\n<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>",
+    # END before START
+    "<<<CHUNK 1 END>>>\na\n<<<CHUNK 1 START>>>\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>",
+    # Mismatched numbers within a pair
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 2 END>>>\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 1 END>>>",
+])
+def test_split_rejects_wrong_order(packer, response):
+    assert packer.split(response, 2) is None
+
+@pytest.mark.parametrize("response", [
+    "Here are the chunks:\n<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>",
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\nstray\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>",
+    "<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>\nDone!",
+])
+def test_split_rejects_text_outside_delimiters(packer, response):
+    assert packer.split(response, 2) is None
+
+def test_split_allows_surrounding_whitespace(packer):
+    response = "\n  <<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\n\n\n<<<CHUNK 2 START>>>\nb\n<<<CHUNK 2 END>>>  \n"
+    assert packer.split(response, 2) == ["a", "b"]
+
+@pytest.mark.parametrize("part", ["", "   \n\n  "])
+def test_split_rejects_empty_parts(packer, part):
+    response = f"<<<CHUNK 1 START>>>\na\n<<<CHUNK 1 END>>>\n<<<CHUNK 2 START>>>{part}<<<CHUNK 2 END>>>"
+    assert packer.split(response, 2) is None
+
+def test_pack_groups_small_chunks_by_key():
+    packer = ChunkPacker(Settings(pack_small_chunk_tokens=10, pack_max_tokens=20))
+    chunks = ["short"] * 3 + ["long " * 50] + ["short"] * 2
+    keys = ["fast", "fast", "strong", "fast", "fast", "fast"]
+    assert packer.pack(chunks, keys) == [[0, 1], [2], [3], [4, 5]]
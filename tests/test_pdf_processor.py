@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from star_to_md.config.settings import Settings
+from star_to_md.core import processor as core_processor
+from star_to_md.core.document import StarDocument
+from star_to_md.processors.hybrid import pdf
+from star_to_md.processors.hybrid.pdf import PdfProcessor
+from star_to_md.utils import resilience
+from star_to_md.utils.errors import ProcessorError
+from star_to_md.utils.resilience import CircuitBreaker
+
+PAGES = [f"page {i}" for i in range(6)]
+
+@pytest.fixture
+def processor():
+    processor = PdfProcessor(Settings(pack_small_chunk_tokens=10, pack_max_tokens=2))
+    processor.metrics.start_conversion("doc")
+    return processor
+
+def _enhance(processor, failing):
+    async def enhance_group(document_id, tier, budget, group):
+        if set(group) & failing:
+            raise RuntimeError("400 Bad Request")
+        return [f"**{chunk}**" for chunk in group]
+
+    processor._enhance_group = enhance_group
+    tiers = [processor.router.default_tier] * len(PAGES)
+    return asyncio.run(processor._enhance_chunks("doc", processor.router.new_budget(), PAGES, tiers))
+
+def test_failed_group_keeps_pandoc_output(processor):
+    assert processor.packer.pack(PAGES) == [[0, 1], [2, 3], [4, 5]]
+    processed = _enhance(processor, failing={"page 2"})
+    assert processed == ["**page 0**", "**page 1**", "page 2", "page 3", "**page 4**", "**page 5**"]
+    metrics = processor.metrics.metrics["doc"]
+    assert metrics.fallbacks == {"llm_error": 1}
+    assert len(metrics.errors) == 1
+
+def test_raises_when_nothing_was_enhanced(processor):
+    with pytest.raises(ProcessorError):
+        _enhance(processor, failing=set(PAGES))
+
+def _chunk_document(settings, monkeypatch):
+    calls = []
+
+    async def run_lmp(lmp, content, api_params=None):
+        calls.append((lmp.__name__, api_params))
+        return "<<<CHUNK 1 START>>>\npage 0\npage 1\n<<<CHUNK 1 END>>>"
+
+    monkeypatch.setattr(pdf, "run_lmp", run_lmp)
+    processor = PdfProcessor(settings)
+    processor.chunker.settings = settings
+    monkeypatch.setattr(processor.chunker, "_extract_pages", lambda doc: iter(["page 0", "page 1"]))
+    doc = StarDocument(id="doc", content="", format="pdf")
+    doc.path = "doc.pdf"
+    processor.metrics.start_conversion(doc.id)
+    budget = doc.metadata["budget"] = processor.router.new_budget()
+    chunks = asyncio.run(processor.chunker.chunk(doc, processor._optional_llm(doc.id, budget)))
+    return chunks, calls, processor.metrics.metrics[doc.id], budget
+
+def test_chunk_optimization_uses_the_fast_tier(monkeypatch):
+    chunks, calls, metrics, budget = _chunk_document(Settings(llm_model="my-fast", max_chunk_size=1), monkeypatch)
+    assert chunks == ["page 0\npage 1"]
+    assert calls == [("optimize_chunks", {"model": "my-fast", "temperature": Settings().llm_temperature})]
+    assert metrics.llm_calls == 1
+    assert budget.tokens_used > 0
+
+def test_chunk_optimization_skipped_when_over_budget(monkeypatch):
+    chunks, calls, metrics, budget = _chunk_document(
+        Settings(document_token_budget=10, max_chunk_size=1), monkeypatch
+    )
+    assert chunks == ["page 0", "page 1"]
+    assert calls == []
+    # Skipping an optional call leaves the budget for the chunks
+    assert not budget.exhausted
+    assert metrics.fallbacks == {}
+
+def test_chunk_optimization_survives_an_outage(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    monkeypatch.setattr(core_processor, "get_circuit_breaker", lambda: breaker)
+    monkeypatch.setattr(resilience, "get_settings", lambda: Settings(llm_retry_base_delay=0))
+    attempts = []
+
+    async def run_lmp(lmp, content, api_params=None):
+        attempts.append(lmp.__name__)
+        raise ConnectionError("503 Service Unavailable")
+
+    monkeypatch.setattr(pdf, "run_lmp", run_lmp)
+    processor = PdfProcessor(Settings(max_chunk_size=1))
+    processor.chunker.settings = processor.settings
+    monkeypatch.setattr(processor.chunker, "_extract_pages", lambda doc: iter(["page 0", "page 1"]))
+    doc = StarDocument(id="doc", content="", format="pdf")
+    doc.path = "doc.pdf"
+    processor.metrics.start_conversion(doc.id)
+
+    chunks = asyncio.run(processor.chunker.chunk(doc, processor._optional_llm(doc.id, processor.router.new_budget())))
+    assert chunks == ["page 0", "page 1"]
+    assert attempts == ["optimize_chunks"] * 3
+    assert processor.metrics.metrics[doc.id].retries == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_unchanged_llm_output_is_remembered(tmp_path):
+    processor = PdfProcessor(Settings(
+        similarity_reuse=True, similarity_index_path=str(tmp_path / "similarity.db"), pack_small_chunk_tokens=0
+    ))
+    processor.metrics.start_conversion("doc")
+    chunks = ["# Already clean markdown", "skipped by the budget"]
+
+    async def enhance_group(document_id, tier, budget, group):
+        # The model returns the first chunk unchanged; the second never reaches it
+        return [group[0] if group[0] == chunks[0] else None]
+
+    processor._enhance_group = enhance_group
+    tiers = [processor.router.default_tier] * len(chunks)
+    processed = asyncio.run(processor._enhance_chunks("doc", processor.router.new_budget(), chunks, tiers))
+    assert processed == chunks
+    assert processor.similarity.lookup(chunks[0]).exact
+    assert processor.similarity.lookup(chunks[1]) is None
@@ -0,0 +1,48 @@
+import contextvars
+from star_to_md.config.ell_config import PoolStats, track_pool_usage
+
+def test_usage_is_per_conversion():
+    stats = PoolStats("sync", max_connections=2)
+    with track_pool_usage():
+        held = [stats.acquire() for _ in range(3)]
+        for release in held:
+            release()
+
+    with track_pool_usage() as usage:
+        stats.acquire()()
+
+    assert usage.snapshot() == {"sync": {
+        "max_connections": 2,
+        "requests": 1,
+        "peak_in_use": 1,
+        "peak_utilization": 0.5,
+        "peak_waiting": 0,
+    }}
+    # The process-wide figures keep accumulating
+    assert stats.snapshot()["requests"] == 4
+    assert stats.snapshot()["peak_in_use"] == 3
+
+def test_requests_are_attributed_to_their_context():
+    stats = PoolStats("sync", max_connections=4)
+
+    def convert(requests: int):
+        with track_pool_usage() as usage:
+            for _ in range(requests):
+                held.append(stats.acquire())
+            return usage
+
+    held = []
+    first = contextvars.copy_context().run(convert, 2)
+    with track_pool_usage() as second:
+        contextvars.copy_context().run(convert, 1)
+        stats.acquire()()
+
+    assert first.snapshot()["sync"]["requests"] == 2
+    assert second.snapshot()["sync"]["requests"] == 1
+    # Requests of other conversions still count towards the shared pool's peak
+    assert second.snapshot()["sync"]["peak_in_use"] == 4
+
+def test_untouched_pools_are_not_reported():
+    with track_pool_usage() as usage:
+        pass
+    assert usage.snapshot() == {}
@@ -0,0 +1,24 @@
+import asyncio
+from star_to_md.llm import runner
+from star_to_md.utils.profiling import PipelineProfiler
+
+def busy_lmp(rounds: int, client=None) -> int:
+    return sum(i * i for i in range(rounds))
+
+def test_worker_thread_cpu_is_profiled(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, "get_llm_client", lambda: None)
+    profiler = PipelineProfiler()
+
+    async def main():
+        await profiler.start()
+        await runner.run_lmp(busy_lmp, 200000)
+        await profiler.stop()
+
+    asyncio.run(main())
+    profiler.write(tmp_path)
+    assert "busy_lmp" in (tmp_path / "cpu.txt").read_text()
+    assert "LMP worker threads" in (tmp_path / "report.txt").read_text()
+
+def test_workers_run_unprofiled_when_idle(monkeypatch):
+    monkeypatch.setattr(runner, "get_llm_client", lambda: None)
+    assert asyncio.run(runner.run_lmp(busy_lmp, 10)) == 285
@@ -0,0 +1,172 @@
+import asyncio
+import httpx
+import openai
+import pytest
+from star_to_md.utils import resilience
+from star_to_md.utils.errors import CircuitOpenError, ProcessorError
+from star_to_md.utils.resilience import CircuitBreaker, caused_by, is_transient, retry_with_jitter
+
+def _connection_error() -> openai.APIConnectionError:
+    """A real connection failure from the OpenAI client (nothing listens on port 1)"""
+    client = openai.OpenAI(api_key="test", base_url="http://127.0.0.1:1/v1", max_retries=0)
+    try:
+        client.models.list()
+    except openai.APIConnectionError as e:
+        return e
+    raise AssertionError("expected a connection error")
+
+def _wrapped(error: Exception) -> ProcessorError:
+    return ProcessorError(message="Failed to convert PDF", processor_name="PdfProcessor", source=error)
+
+class TestIsTransient:
+    def test_openai_connection_error(self):
+        error = _connection_error()
+        # The innermost error is the HTTP library's, which is not listed itself
+        assert error.__cause__ is not None
+        assert not isinstance(error.__cause__, resilience.TRANSIENT_ERRORS)
+        assert is_transient(error)
+
+    def test_openai_timeout(self):
+        request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+        try:
+            try:
+                raise httpx.ReadTimeout("timed out", request=request)
+            except httpx.ReadTimeout as e:
+                raise openai.APITimeoutError(request=request) from e
+        except openai.APITimeoutError as e:
+            assert is_transient(e)
+
+    def test_wrapped_in_processor_error(self):
+        assert is_transient(_wrapped(_connection_error()))
+
+    def test_plain_errors(self):
+        assert is_transient(asyncio.TimeoutError())
+        assert not is_transient(ValueError("bad input"))
+        assert not is_transient(_wrapped(ValueError("bad input")))
+
+    def test_caused_by(self):
+        assert caused_by(_wrapped(CircuitOpenError(message="open")), CircuitOpenError)
+        assert not caused_by(_wrapped(ValueError()), CircuitOpenError)
+
+class TestRetryWithJitter:
+    def test_retries_transient_errors(self):
+        calls = []
+        retried = []
+
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ConnectionError("reset")
+            return "ok"
+
+        result = asyncio.run(retry_with_jitter(flaky, attempts=3, base_delay=0, on_retry=retried.append))
+        assert result == "ok"
+        assert len(calls) == 3
+        assert len(retried) == 2
+
+    def test_gives_up_after_attempts(self):
+        calls = []
+
+        async def down():
+            calls.append(1)
+            raise ConnectionError("refused")
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(retry_with_jitter(down, attempts=3, base_delay=0))
+        assert len(calls) == 3
+
+    def test_does_not_retry_other_errors(self):
+        calls = []
+
+        async def bad():
+            calls.append(1)
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            asyncio.run(retry_with_jitter(bad, attempts=3, base_delay=0))
+        assert len(calls) == 1
+
+    def test_zero_attempts_still_calls_once(self):
+        calls = []
+
+        async def ok():
+            calls.append(1)
+            return "ok"
+
+        assert asyncio.run(retry_with_jitter(ok, attempts=0, base_delay=0)) == "ok"
+        assert len(calls) == 1
+
+class TestCircuitBreaker:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(resilience.time, "monotonic", lambda: now[0])
+        return now
+
+    @staticmethod
+    def _fail(breaker: CircuitBreaker, error: Exception) -> None:
+        async def failing():
+            raise error
+
+        with pytest.raises(type(error)):
+            asyncio.run(breaker.call(failing))
+
+    @staticmethod
+    def _succeed(breaker: CircuitBreaker) -> str:
+        async def ok():
+            return "ok"
+
+        return asyncio.run(breaker.call(ok))
+
+    def test_opens_after_threshold(self, clock):
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+        for _ in range(2):
+            self._fail(breaker, ConnectionError())
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        self._fail(breaker, ConnectionError())
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.trips == 1
+        with pytest.raises(CircuitOpenError) as raised:
+            self._succeed(breaker)
+        assert raised.value.retry_after == pytest.approx(30)
+
+    def test_success_resets_failures(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        self._fail(breaker, ConnectionError())
+        self._succeed(breaker)
+        self._fail(breaker, ConnectionError())
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_non_transient_errors_do_not_count(self, clock):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        self._fail(breaker, ConnectionError())
+        self._fail(breaker, ValueError())
+        self._fail(breaker, ConnectionError())
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_success_closes(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        self._fail(breaker, ConnectionError())
+        clock[0] += 31
+        assert self._succeed(breaker) == "ok"
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_trial_failure_reopens(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        self._fail(breaker, ConnectionError())
+        clock[0] += 31
+        self._fail(breaker, ConnectionError())
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.trips == 2
+
+    def test_half_open_allows_a_single_trial(self, clock):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        self._fail(breaker, ConnectionError())
+        clock[0] += 31
+        breaker.before_call()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,57 @@
+import pytest
+from star_to_md.config.settings import Settings
+from star_to_md.services.router import ModelRouter, table_lines
+
+ANNUAL_REPORT = """In 2023 the company continued to return value to shareholders;
+revenue grew in every region, and the board approved a new class of shares.
+Management will import best practices from our acquisitions and function
+as a single organisation; net debt fell for the third consecutive year.
+We expect these trends to continue into the next financial year."""
+
+LAYOUT_PROSE = """The results for  the year  reflect      markets remained  volatile, with
+strong demand  in our core markets      interest rates  rising faster than
+and disciplined cost  control across    expected in the  second half.  Our
+the group.  Operating margin rose to    balance sheet remains  strong and
+the highest level in a decade.          well placed for the year ahead."""
+
+LAYOUT_TABLE = """Region          2022      2023    Change
+Europe           412       455      10.4
+Americas       1,204     1,310       8.8
+Asia Pacific     388       402       3.6
+Total          2,004     2,167       8.1"""
+
+PYTHON_CODE = """import os
+from pathlib import Path
+
+def load(path):
+    with open(path) as f:
+        return f.read()
+
+class Loader(object):
+    pass"""
+
+JS_CODE = """const fs = require("fs");
+function load(path) {
+    return fs.readFileSync(path);
+}
+export default load;"""
+
+@pytest.fixture
+def router():
+    return ModelRouter(Settings(llm_complexity_threshold=0.6))
+
+@pytest.mark.parametrize("text", [ANNUAL_REPORT, LAYOUT_PROSE])
+def test_prose_routes_to_fast_tier(router, text):
+    assert router.score(text) < 0.3
+    assert router.route(text).name == "fast"
+
+@pytest.mark.parametrize("text", [LAYOUT_TABLE, PYTHON_CODE, JS_CODE])
+def test_tables_and_code_route_to_strong_tier(router, text):
+    assert router.route(text).name == "strong"
+
+def test_table_needs_consecutive_aligned_rows():
+    rows = LAYOUT_TABLE.splitlines()
+    assert table_lines(rows) == len(rows)
+    assert table_lines(rows[:2]) == 0
+    # Misaligned three-column lines are not a table
+    assert table_lines(["a  b  c", "long cell here  x  y", "z  long cell again  w"]) == 0
@@ -0,0 +1,73 @@
+import sqlite3
+import pytest
+from star_to_md.config.settings import Settings
+from star_to_md.services.similarity import SimilarityIndex, normalize, source_hash
+
+BODY = """Installation guide for the X200 controller. Mount the unit on a flat
+surface, connect the supply cable to terminal A and the sensor cable to
+terminal B, then power on and wait for the status light to turn green."""
+
+def _page(number: int) -> str:
+    return f"Section {number}\n{BODY}\nPage {number} of 40"
+
+@pytest.fixture
+def index(tmp_path):
+    index = SimilarityIndex(Settings(similarity_index_path=str(tmp_path / "similarity.db")))
+    yield index
+    index.close()
+
+def test_normalize_masks_dates_numbers_and_punctuation():
+    assert normalize("Revised 12 March 2024:  Table 3.1,  page 42!") == "revised <date> table <num> page <num>"
+    assert normalize("Issued 2024-03-12") == normalize("Issued 2023-11-30")
+    assert normalize("A\n\tB") == "a b"
+
+def test_source_hash_ignores_whitespace_only():
+    assert source_hash("a  b\nc") == source_hash(" a b c ")
+    assert source_hash("Page 1") != source_hash("Page 2")
+
+def test_lookup_prefers_exact_match(index):
+    for number in range(4):
+        index.add(_page(number), f"markdown {number}")
+    for number in range(4):
+        match = index.lookup(_page(number))
+        assert match.exact
+        assert match.markdown == f"markdown {number}"
+
+def test_lookup_exact_ignores_whitespace(index):
+    index.add(_page(1), "markdown 1")
+    match = index.lookup(_page(1).replace("\n", "\n\n  "))
+    assert match.exact and match.similarity == 1.0
+
+def test_lookup_near_duplicate(index):
+    index.add(_page(1), "markdown 1")
+    match = index.lookup(_page(7))
+    assert match is not None
+    assert not match.exact
+    assert match.markdown == "markdown 1"
+    assert match.similarity >= index.settings.similarity_threshold
+
+def test_lookup_miss(index):
+    index.add(_page(1), "markdown 1")
+    assert index.lookup("Quarterly revenue rose in every region of the group.") is None
+
+def test_add_skips_duplicates(index):
+    index.add(_page(1), "markdown 1")
+    index.add(_page(1) + "\n", "markdown again")
+    assert index.db.execute("SELECT COUNT(*) FROM chunks").fetchone() == (1,)
+    assert index.lookup(_page(1)).markdown == "markdown 1"
+
+def test_existing_index_gets_source_hashes(tmp_path):
+    path = tmp_path / "old.db"
+    db = sqlite3.connect(str(path))
+    db.executescript("""
+        CREATE TABLE chunks (id INTEGER PRIMARY KEY, source TEXT NOT NULL, normalized TEXT NOT NULL, markdown TEXT NOT NULL);
+        CREATE TABLE buckets (band INTEGER NOT NULL, bucket TEXT NOT NULL, chunk_id INTEGER NOT NULL);
+    """)
+    db.execute("INSERT INTO chunks (source, normalized, markdown) VALUES (?, ?, ?)", (_page(2), normalize(_page(2)), "old"))
+    db.commit()
+    db.close()
+
+    index = SimilarityIndex(Settings(similarity_index_path=str(path)))
+    match = index.lookup(_page(2))
+    index.close()
+    assert match.exact and match.markdown == "old"